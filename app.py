@@ -1,19 +1,35 @@
+import atexit
+import bisect
+import csv
+import functools
+import hashlib
+import io
 import json
+import logging
 import os
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-from statistics import mean
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar
 
 import html
 
-import plotly.graph_objects as go
+import numpy as np
 import streamlit as st
 
-try:
-    from anthropic import Anthropic, APIError
-except ImportError:  # Streamlit will surface this nicely to the user
-    Anthropic = None
-    APIError = Exception
+logger = logging.getLogger(__name__)
+
+# anthropic（評価）と plotly（レーダーチャート）は、使うページで初めて必要になった時点で読み込む
 
 COMPETENCY_LABELS = [
     ("戦略構想力", "戦略構想力"),
@@ -93,6 +109,8 @@ GROUP_TRAINING_SAMPLE_FEEDBACK = [
 
 
 EvaluationPayload = Dict[str, Any]
+# ストリーミング評価で観点の評価が届くたびに (セクション, 観点, {"score", "reason"}) で呼ばれる
+ScoreEntryCallback = Callable[[str, str, Dict[str, Any]], None]
 
 
 GOAL_SETTING_CRITERIA = [
@@ -141,6 +159,72 @@ GROUP_TRAINING_SECTIONS = [
 ]
 
 
+# 研修当日記入の設問①〜⑦ごとの評価観点（設問ごとに別のリクエストで並列に評価する）
+ROLE_CAPABILITY_CRITERIA = [
+    "管理者の役割を業績達成と部下育成の両面から捉えている",
+    "上位方針を自部署の目標に落とし込む役割に言及されている",
+    "管理者に求められる能力（目標設定・計画・組織化・動機づけ等）を挙げている",
+    "管理者としての資質（責任感・公正さ・誠実さ等）に言及されている",
+    "自身の現状と求められる役割とのギャップを認識している",
+]
+
+PLANNING_CRITERIA = [
+    "目標達成までの手順を具体的な行動に分解しようとしている",
+    "期限や優先順位を明確にした計画にしようとしている",
+    "必要な資源（人・時間・予算）の見積もりに言及されている",
+    "リスクや障害を想定し代替案を用意しようとしている",
+    "進捗を確認し計画を見直す仕組みに言及されている",
+]
+
+ORGANIZATION_CRITERIA = [
+    "メンバーの役割分担と責任範囲を明確にしようとしている",
+    "メンバーの強みや特性を踏まえた配置に言及されている",
+    "権限委譲によってメンバーの主体性を引き出そうとしている",
+    "部署内外の連携・協力体制づくりに言及されている",
+    "業務の仕組みやルールを整え効率化しようとしている",
+]
+
+COMMUNICATION_CRITERIA = [
+    "傾聴によってメンバーの考えや状況を把握しようとしている",
+    "方針や期待を分かりやすく伝える工夫が表記されている",
+    "定期的な面談や対話の場づくりに言及されている",
+    "上司・他部署への報告・連絡・相談に言及されている",
+    "相手や状況に応じて伝え方を変えようとしている",
+]
+
+MOTIVATION_CRITERIA = [
+    "メンバー一人ひとりの価値観や欲求を理解しようとしている",
+    "仕事の意味や組織の目標とのつながりを伝えようとしている",
+    "成果や努力を承認・称賛することに言及されている",
+    "挑戦の機会や裁量を与えて意欲を高めようとしている",
+    "意欲を下げる要因を把握し取り除こうとしている",
+]
+
+DEVELOPMENT_CRITERIA = [
+    "部下育成を管理者の使命として位置づけている",
+    "メンバーごとの育成目標や課題を設定しようとしている",
+    "仕事の割り当てやOJTを通じた育成に言及されている",
+    "振り返りやフィードバックで成長を支援しようとしている",
+    "自らが手本となって学び続ける姿勢が表記されている",
+]
+
+# 設問の項目キー → 評価観点（①〜⑦の順）
+GROUP_TRAINING_RUBRICS: Dict[str, List[str]] = {
+    "role_capability": ROLE_CAPABILITY_CRITERIA,
+    "goal_setting": GOAL_SETTING_CRITERIA,
+    "planning": PLANNING_CRITERIA,
+    "organization": ORGANIZATION_CRITERIA,
+    "communication": COMMUNICATION_CRITERIA,
+    "motivation": MOTIVATION_CRITERIA,
+    "development": DEVELOPMENT_CRITERIA,
+}
+
+# 項目キー → 入力欄の見出し（例: "②目標設定能力を高めるには"）
+GROUP_TRAINING_FIELD_LABELS = {
+    field_key: label for _, field_defs in GROUP_TRAINING_SECTIONS for field_key, label, _ in field_defs
+}
+
+
 GROUP_TRAINING_FIELD_KEYS = {
     "name": "group_training_name",
     "course_url": "group_training_course_url",
@@ -160,11 +244,116 @@ GROUP_TRAINING_FIELD_KEYS = {
 GROUP_TRAINING_NAV_OPTIONS = ["受講者入力", "評価デモ(JMA様用)", "評価デモ(クライアント用)"]
 
 
+# 一括評価で同時に発行するClaude呼び出しの上限
+BULK_EVALUATION_MAX_WORKERS = int(os.getenv("BULK_EVALUATION_MAX_WORKERS", "8"))
+# 一括評価ジョブの期限（秒）と進捗表示の更新間隔（秒）
+EVALUATION_JOB_DEADLINE_SECONDS = float(os.getenv("EVALUATION_JOB_DEADLINE_SECONDS", "1800"))
+EVALUATION_JOB_POLL_SECONDS = 1.0
+# Message Batches の処理状況を自動確認する間隔（秒）
+EVALUATION_BATCH_POLL_SECONDS = 60.0
+
+# 描画プロファイラー（1で有効）。render_* 関数と main の所要時間を再実行ごとに集計する
+RENDER_PROFILING = os.getenv("RENDER_PROFILING", "0") == "1"
+# パーセンタイルの計算と書き出しに使う直近の再実行回数、書き出し先
+RENDER_PROFILE_WINDOW = int(os.getenv("RENDER_PROFILE_WINDOW", "200"))
+RENDER_PROFILE_DIRECTORY = os.getenv("RENDER_PROFILE_DIRECTORY", os.path.join(".cache", "profiles"))
+
+# 評価結果のエクスポート先と、列指向形式で1回に書き込む行数
+EXPORT_DIRECTORY = os.getenv("EXPORT_DIRECTORY", os.path.join(".cache", "exports"))
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_FORMATS = {
+    "JSONL": ".jsonl",
+    "CSV": ".csv",
+    "Parquet（スコアのみ）": ".parquet",
+    "Arrow（スコアのみ）": ".arrow",
+}
+
+# 評価ページの受講者一覧で1ページに表示する人数
+PARTICIPANT_PAGE_SIZE = int(os.getenv("PARTICIPANT_PAGE_SIZE", "20"))
+PARTICIPANT_STATUS_FILTERS = ["すべて", "未評価", "評価中", "評価済み", "一部失敗"]
+# 総合スコアの絞り込み（下限以上・上限未満）
+PARTICIPANT_SCORE_BANDS: Dict[str, Optional[Tuple[float, float]]] = {
+    "すべて": None,
+    "4点以上": (4.0, 5.1),
+    "3点以上4点未満": (3.0, 4.0),
+    "3点未満": (0.0, 3.0),
+}
+
+
+# Claude APIへのリクエスト調停（0 はレスポンスヘッダーで通知された上限に従う）
+CLAUDE_REQUESTS_PER_MINUTE = int(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", "0"))
+CLAUDE_TOKENS_PER_MINUTE = int(os.getenv("CLAUDE_TOKENS_PER_MINUTE", "0"))
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "6"))
+CLAUDE_RETRY_BASE_SECONDS = 1.0
+CLAUDE_RETRY_MAX_SECONDS = 60.0
+# これより遅い応答が続く場合は同時実行数を下げる
+CLAUDE_LATENCY_CEILING_SECONDS = float(os.getenv("CLAUDE_LATENCY_CEILING_SECONDS", "90"))
+# API呼び出し統計でパーセンタイルの計算に使う直近の呼び出し件数（モデル・評価種別ごと）
+EVALUATION_TELEMETRY_WINDOW = int(os.getenv("EVALUATION_TELEMETRY_WINDOW", "1000"))
+
+EVALUATION_MODEL = "claude-opus-4-20250514"
+# 段階的なモデル選択。"large": 常に EVALUATION_MODEL で評価する（既定）
+# "tiered": EVALUATION_FAST_MODEL で先に評価し、判定の微妙な結果だけを EVALUATION_MODEL で評価し直す
+EVALUATION_ROUTING = os.getenv("EVALUATION_ROUTING", "large")
+# 段階的な選択で先に使うモデル。"tiered" のときは必ず指定する
+EVALUATION_FAST_MODEL = os.getenv("EVALUATION_FAST_MODEL", "")
+# 高速モデルの平均スコアがスコア帯の境界（3点・4点）からこの幅以内なら、境界付近として評価し直す
+# 観点スコアは1点刻みのため、平均は観点数に応じた刻みになる。0 なら境界ちょうどの場合だけ評価し直す
+EVALUATION_ESCALATION_MARGIN = float(os.getenv("EVALUATION_ESCALATION_MARGIN", "0.1"))
+# 根拠がこの文字数に満たない観点があれば、確信度が低いとみなして評価し直す
+EVALUATION_MIN_REASON_CHARS = int(os.getenv("EVALUATION_MIN_REASON_CHARS", "10"))
+SCORE_BAND_BOUNDARIES = sorted({band[0] for band in PARTICIPANT_SCORE_BANDS.values() if band and band[0] > 0})
+# 出力上限（max_tokens）は評価観点の数から決める: 基本分（総評とJSONの枠）+ 観点数 × 観点あたりの見込み
+EVALUATION_OUTPUT_BASE_TOKENS = int(os.getenv("EVALUATION_OUTPUT_BASE_TOKENS", "240"))
+EVALUATION_OUTPUT_TOKENS_PER_CRITERION = int(os.getenv("EVALUATION_OUTPUT_TOKENS_PER_CRITERION", "120"))
+# 評価に送る入力のトークン予算（見積もり値）。超えた入力欄は文単位で前後を残して中略する
+EVALUATION_FIELD_TOKEN_BUDGET = int(os.getenv("EVALUATION_FIELD_TOKEN_BUDGET", "1500"))
+EVALUATION_INPUT_TOKEN_BUDGET = int(os.getenv("EVALUATION_INPUT_TOKEN_BUDGET", "6000"))
+# プロンプトの文面や期待するJSON構造を変えたら更新する（評価キャッシュのキーに含まれる）
+PROMPT_TEMPLATE_VERSION = "3"
+# 一括評価の開始前に静的プレフィックスだけを送ってプロンプトキャッシュを温めるか
+PROMPT_CACHE_WARMUP = os.getenv("PROMPT_CACHE_WARMUP", "1") != "0"
+PROMPT_CACHE_WARMUP_TIMEOUT_SECONDS = 60.0
+# モデルがキャッシュできるプレフィックスの最小トークン数。静的プレフィックスの見積もりがこれに満たない評価器は
+# キャッシュが効かないため、ウォームアップを送らない（最小値はモデルにより異なる）
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+# "tool": 評価基準をツールのJSONスキーマとして宣言し、型付きの引数で受け取る
+# "json": 従来どおりテキストでJSONを出力させて解析する
+EVALUATION_OUTPUT_MODE = os.getenv("EVALUATION_OUTPUT_MODE", "tool")
+EVALUATION_TOOL_NAME = "record_evaluation"
+# 個別評価でストリーミングAPIを使い、届いた観点から順にスコアカードを表示するか
+EVALUATION_STREAMING = os.getenv("EVALUATION_STREAMING", "1") != "0"
+
+# 評価キャッシュ（同一入力の再評価を省略するためのSQLiteファイル）
+EVALUATION_CACHE_PATH = os.getenv("EVALUATION_CACHE_PATH", os.path.join(".cache", "evaluation_cache.sqlite3"))
+EVALUATION_CACHE_MAX_ENTRIES = int(os.getenv("EVALUATION_CACHE_MAX_ENTRIES", "5000"))
+EVALUATION_CACHE_MAX_AGE_SECONDS = float(os.getenv("EVALUATION_CACHE_MAX_AGE_DAYS", "30")) * 24 * 60 * 60
+
+# 受講者名簿と評価結果の保存先（全セッションで共有するSQLiteファイル）
+PARTICIPANT_STORE_PATH = os.getenv("PARTICIPANT_STORE_PATH", os.path.join(".cache", "participants.sqlite3"))
+# 書き込みをまとめて反映する間隔（秒）
+PARTICIPANT_STORE_FLUSH_SECONDS = float(os.getenv("PARTICIPANT_STORE_FLUSH_SECONDS", "0.5"))
+
+
+@dataclass
+class EvaluationSummary:
+    """評価結果から一度だけ計算しておく表示用の集計値。"""
+
+    section_averages: Dict[str, float]
+    overall_score: float
+    top: Tuple[str, int]
+    growth: Tuple[str, int]
+    rank: int = 0
+    cohort_size: int = 0
+
+
 @dataclass
 class StudentRecord:
     name: str
     inputs: Dict[str, str]
     evaluation: Optional[EvaluationPayload] = None
+    record_id: Optional[int] = None
+    summary: Optional[EvaluationSummary] = None
 
 
 @dataclass
@@ -172,18 +361,1266 @@ class GroupTrainingParticipant:
     name: str
     inputs: Dict[str, str]
     evaluation: Optional[Dict[str, Any]] = None
+    record_id: Optional[int] = None
+    summary: Optional[EvaluationSummary] = None
+
+
+def read_setting(name: str) -> Optional[str]:
+    """Streamlitのsecrets、環境変数の順に設定値を読む。
+
+    secrets.toml がない環境（コマンドラインからの一括評価など）では環境変数のみを見る。
+    """
+    try:
+        value = st.secrets.get(name)
+    except FileNotFoundError:
+        value = None
+    return value or os.getenv(name)
 
 
 @st.cache_resource(show_spinner=False)
-def get_anthropic_client() -> Anthropic:
-    api_key = st.secrets.get("ANTHROPIC_API_KEY") if hasattr(st, "secrets") else None
-    if not api_key:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
+def get_anthropic_client() -> Any:
+    api_key = read_setting("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError("環境変数 ANTHROPIC_API_KEY が設定されていません。")
-    if Anthropic is None:
-        raise ImportError("anthropic パッケージが見つかりません。");
-    return Anthropic(api_key=api_key)
+    try:
+        from anthropic import Anthropic
+    except ImportError as exc:  # Streamlit will surface this nicely to the user
+        raise ImportError("anthropic パッケージが見つかりません。") from exc
+    # ローカルの代替エンドポイント（バッチAPIの検証用など）に向ける場合に指定する
+    base_url = read_setting("ANTHROPIC_BASE_URL")
+    # 再試行は RequestGovernor が一元的に行うため、SDK側の自動再試行は無効にする
+    return Anthropic(api_key=api_key, base_url=base_url or None, max_retries=0)
+
+
+class AnthropicNotLoadedError(Exception):
+    """anthropic を読み込む前の APIError の代わり。APIを呼んでいなければAPIエラーは起こらないため、送出されることはない。"""
+
+
+def api_error_type() -> type:
+    """except 節で使う APIError。anthropic が未読み込みなら、読み込まずに代わりの型を返す。"""
+    anthropic_module = sys.modules.get("anthropic")
+    return getattr(anthropic_module, "APIError", AnthropicNotLoadedError)
+
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """1分あたりの上限を連続的に補充するトークンバケット。上限0は無制限。"""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def set_rate(self, per_minute: float) -> None:
+        self._refill()
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.per_minute > 0:
+            self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_seconds(self, amount: float) -> float:
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def consume(self, amount: float) -> None:
+        if self.per_minute > 0:
+            self.level -= amount
+
+
+class RequestGovernor:
+    """Claude APIへのリクエストをプロセス全体で調停する。
+
+    - 1分あたりのリクエスト数・トークン数の予算（未設定ならレスポンスヘッダーの上限）を守る
+    - 429/529/5xx/接続エラーを retry-after またはジッター付き指数バックオフで再試行する
+    - 同時実行数をAIMDで調整する（成功で少しずつ増やし、429や極端な遅延で半減）
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        latency_ceiling_seconds: float,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency_limit = float(max(1, self.max_concurrency // 2))
+        self.max_retries = max_retries
+        self.latency_ceiling_seconds = latency_ceiling_seconds
+        self._configured_rpm = requests_per_minute
+        self._configured_tpm = tokens_per_minute
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "succeeded": 0, "throttled": 0, "retries": 0, "failed": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def call(
+        self,
+        send: Callable[[], T],
+        *,
+        estimated_tokens: int = 0,
+        headers_of: Optional[Callable[[T], Optional[Mapping[str, str]]]] = None,
+        on_retry: Optional[Callable[[BaseException], None]] = None,
+    ) -> T:
+        """send を予算と同時実行数の範囲で実行し、再試行可能なエラーなら再試行する。
+
+        on_retry は再試行を決めるたびに、原因となった例外を受け取って呼ばれる。
+        """
+        attempt = 0
+        while True:
+            self._acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                result = send()
+            except api_error_type() as exc:
+                status = getattr(exc, "status_code", None)
+                response = getattr(exc, "response", None)
+                headers = response.headers if response is not None else None
+                retryable = status is None or status in (408, 409, 429) or status >= 500
+                self._release(throttled=status in (429, 529), headers=headers)
+                if not retryable or attempt >= self.max_retries:
+                    with self._condition:
+                        self.stats["failed"] += 1
+                    raise
+                attempt += 1
+                with self._condition:
+                    self.stats["retries"] += 1
+                if on_retry:
+                    on_retry(exc)
+                time.sleep(self._retry_delay(attempt, headers))
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release(
+                latency=time.monotonic() - started,
+                headers=headers_of(result) if headers_of else None,
+            )
+            return result
+
+    def _acquire(self, estimated_tokens: int) -> None:
+        with self._condition:
+            while True:
+                wait = max(
+                    self._blocked_until - time.monotonic(),
+                    self._requests.wait_seconds(1),
+                    self._tokens.wait_seconds(estimated_tokens),
+                    0.0,
+                )
+                if wait <= 0 and self._in_flight < int(self.concurrency_limit):
+                    self._requests.consume(1)
+                    self._tokens.consume(estimated_tokens)
+                    self._in_flight += 1
+                    self.stats["requests"] += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else 1.0)
+
+    def _release(
+        self,
+        *,
+        latency: Optional[float] = None,
+        throttled: bool = False,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if headers:
+                self._apply_rate_limit_headers(headers)
+            if throttled:
+                self.stats["throttled"] += 1
+                self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+            elif latency is not None:
+                self.stats["succeeded"] += 1
+                if latency > self.latency_ceiling_seconds:
+                    self.concurrency_limit = max(1.0, self.concurrency_limit * 0.8)
+                else:
+                    self.concurrency_limit = min(
+                        float(self.max_concurrency),
+                        self.concurrency_limit + 1 / self.concurrency_limit,
+                    )
+            self._condition.notify_all()
+
+    def _apply_rate_limit_headers(self, headers: Mapping[str, str]) -> None:
+        retry_after = parse_retry_after(headers)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+        for kind, bucket, configured in (
+            ("requests", self._requests, self._configured_rpm),
+            ("tokens", self._tokens, self._configured_tpm),
+        ):
+            limit = headers.get(f"anthropic-ratelimit-{kind}-limit")
+            if limit and limit.isdigit() and not configured and bucket.per_minute != int(limit):
+                bucket.set_rate(int(limit))
+            remaining = headers.get(f"anthropic-ratelimit-{kind}-remaining")
+            reset = headers.get(f"anthropic-ratelimit-{kind}-reset")
+            if remaining == "0" and reset:
+                try:
+                    reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00")).timestamp()
+                except ValueError:
+                    continue
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + max(reset_at - time.time(), 0.0)
+                )
+
+    def _retry_delay(self, attempt: int, headers: Optional[Mapping[str, str]]) -> float:
+        retry_after = parse_retry_after(headers) if headers else None
+        if retry_after is not None:
+            return min(retry_after, CLAUDE_RETRY_MAX_SECONDS)
+        ceiling = min(CLAUDE_RETRY_MAX_SECONDS, CLAUDE_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_request_governor() -> RequestGovernor:
+    return RequestGovernor(
+        max_concurrency=BULK_EVALUATION_MAX_WORKERS,
+        requests_per_minute=CLAUDE_REQUESTS_PER_MINUTE,
+        tokens_per_minute=CLAUDE_TOKENS_PER_MINUTE,
+        max_retries=CLAUDE_MAX_RETRIES,
+        latency_ceiling_seconds=CLAUDE_LATENCY_CEILING_SECONDS,
+    )
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """トークン予算の消費見込み。入力を estimate_text_tokens で見積もり、出力上限を足す。"""
+    tokens = estimate_text_tokens(json.dumps(request.get("system", ""), ensure_ascii=False))
+    tokens += estimate_text_tokens(json.dumps(request.get("messages", []), ensure_ascii=False))
+    return tokens + int(request.get("max_tokens", 0))
+
+
+def estimate_text_tokens(text: str) -> int:
+    """APIを呼ばずにトークン数を見積もる。日本語（ASCII以外）は1文字1トークン、ASCIIは4文字1トークンとして数える。"""
+    ascii_count = len(text.encode("ascii", "ignore"))
+    return len(text) - ascii_count + (ascii_count + 3) // 4
+
+
+def rubric_max_tokens(criterion_count: int) -> int:
+    """評価観点の数に見合った出力上限。"""
+    return EVALUATION_OUTPUT_BASE_TOKENS + EVALUATION_OUTPUT_TOKENS_PER_CRITERION * criterion_count
+
+
+# 見た目の区別がつかない幅の違い（半角カナ・全角英数など）はNFKCで揃え、ゼロ幅文字は除く
+ZERO_WIDTH_PATTERN = re.compile("[\u200b-\u200d\u2060\ufeff]")
+HORIZONTAL_SPACE_PATTERN = re.compile(r"[^\S\n]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+# 文の区切り（句点・感嘆符・疑問符の後、または改行）
+SENTENCE_PATTERN = re.compile(r"[^。！？!?\n]*(?:[。！？!?]+|\n|$)")
+ELISION_MARKER = "（中略）"
+
+
+def normalize_evaluation_text(text: str) -> str:
+    """入力欄の文字列をNFKC正規化し、行内の連続した空白と3行以上の空行を詰める。"""
+    # 日本語の文章は全角スペース以外は正規化済みのことが多いため、全角スペースだけ先に置き換えて判定で済ませる
+    text = (text or "").replace("\u3000", " ")
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    text = ZERO_WIDTH_PATTERN.sub("", text)
+    lines = [HORIZONTAL_SPACE_PATTERN.sub(" ", line).strip() for line in text.splitlines()]
+    return BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def truncate_to_token_budget(text: str, budget: int) -> str:
+    """先頭から見積もりトークン数が budget に収まるところまでを残す。"""
+    used = 0.0
+    for position, character in enumerate(text):
+        used += 0.25 if character < "\x80" else 1
+        if used > budget:
+            return text[:position]
+    return text
+
+
+def shorten_to_token_budget(text: str, budget: int) -> str:
+    """見積もりトークン数が budget を超える文章を、文単位で先頭と末尾を残して中略する。
+
+    先頭（課題や結論が書かれやすい）に予算の2/3、末尾（まとめ）に残りを使う。
+    先頭の1文だけで予算を超える場合は、その文を途中で切る。
+    """
+    if estimate_text_tokens(text) <= budget:
+        return text
+    available = max(budget - estimate_text_tokens(ELISION_MARKER), 0)
+    sentences = [sentence for sentence in SENTENCE_PATTERN.findall(text) if sentence.strip()]
+    head: List[str] = []
+    used = 0
+    for sentence in sentences:
+        cost = estimate_text_tokens(sentence)
+        if used + cost > available * 2 // 3:
+            break
+        head.append(sentence)
+        used += cost
+    if not head:
+        return truncate_to_token_budget(text, available) + ELISION_MARKER
+    tail: List[str] = []
+    for sentence in reversed(sentences[len(head) :]):
+        cost = estimate_text_tokens(sentence)
+        if used + cost > available:
+            break
+        tail.append(sentence)
+        used += cost
+    return "".join(head).rstrip() + ELISION_MARKER + "".join(reversed(tail)).lstrip()
+
+
+def allocate_field_budgets(costs: Dict[str, int], total: int, per_field: int) -> Dict[str, int]:
+    """入力欄ごとの予算を決める。全体の予算を超える場合は、短い欄はそのまま、長い欄で残りを等分する。"""
+    budgets = {label: min(cost, per_field) for label, cost in costs.items()}
+    if sum(budgets.values()) <= total:
+        return budgets
+    remaining = total
+    pending = sorted(budgets, key=budgets.get)
+    while pending and budgets[pending[0]] <= remaining // len(pending):
+        remaining -= budgets[pending[0]]
+        pending.pop(0)
+    for label in pending:
+        budgets[label] = remaining // len(pending)
+    return budgets
+
+
+def prepare_evaluation_inputs(inputs: Dict[str, str]) -> Dict[str, str]:
+    """評価に送る前の前処理: 正規化し、入力欄ごと・全体のトークン予算に収める。"""
+    normalized = {label: normalize_evaluation_text(value) for label, value in inputs.items()}
+    costs = {label: estimate_text_tokens(value) for label, value in normalized.items()}
+    budgets = allocate_field_budgets(costs, EVALUATION_INPUT_TOKEN_BUDGET, EVALUATION_FIELD_TOKEN_BUDGET)
+    return {label: shorten_to_token_budget(value, budgets[label]) for label, value in normalized.items()}
+
+
+@dataclass
+class EvaluationCallRecord:
+    """評価のAPI呼び出し1回分の計測値。"""
+
+    evaluator: str
+    model: str
+    mode: str  # create / stream / batch
+    wall_seconds: Optional[float] = None
+    ttft_seconds: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    stop_reason: Optional[str] = None
+    retries: int = 0
+    # tool_use / direct（そのままJSON）/ repaired（抽出して復元）/ failed（JSONにならない）/ invalid（検証エラー）
+    json_outcome: Optional[str] = None
+    error: Optional[str] = None
+
+    def count_retry(self, _exc: BaseException) -> None:
+        self.retries += 1
+
+    def observe_message(self, message: Any) -> None:
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            self.input_tokens = getattr(usage, "input_tokens", 0) or 0
+            self.output_tokens = getattr(usage, "output_tokens", 0) or 0
+            self.cache_read_tokens = getattr(usage, "cache_read_input_tokens", 0) or 0
+            self.cache_creation_tokens = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.stop_reason = getattr(message, "stop_reason", None)
+
+    def parse_message(self, spec: "EvaluatorSpec", message: Any) -> Dict[str, Any]:
+        """spec.parse_message で評価を取り出し、JSONの復元結果を記録する。"""
+        self.observe_message(message)
+        self.json_outcome = json_parse_outcome(message)
+        try:
+            return spec.parse_message(message)
+        except JsonExtractionError:
+            self.json_outcome = "failed"
+            raise
+        except ValueError:
+            self.json_outcome = "invalid"
+            raise
+
+
+def json_parse_outcome(message: Any) -> str:
+    """応答がツール引数・そのままのJSON・前後の文章などから抽出したJSONのどれだったかを返す。"""
+    text_parts = []
+    for block in getattr(message, "content", None) or []:
+        if getattr(block, "type", None) == "tool_use" and block.name == EVALUATION_TOOL_NAME:
+            return "tool_use"
+        if hasattr(block, "text"):
+            text_parts.append(block.text)
+    try:
+        json.loads("".join(text_parts))
+    except ValueError:
+        return "repaired"
+    return "direct"
+
+
+class EvaluationTelemetry:
+    """評価のAPI呼び出しの計測値をモデル・評価種別ごとに集計する。
+
+    パーセンタイルは直近 window 件から計算し、件数・トークン数などの累計はプロセス起動時から数える。
+    """
+
+    TOKEN_FIELDS = (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_tokens"),
+        ("cache_creation", "cache_creation_tokens"),
+    )
+
+    def __init__(self, window: int) -> None:
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._recent: Dict[Tuple[str, str], Deque[EvaluationCallRecord]] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def record(self, call: EvaluationCallRecord) -> None:
+        labels = (("evaluator", call.evaluator), ("model", call.model))
+        with self._lock:
+            recent = self._recent.setdefault((call.evaluator, call.model), deque(maxlen=self.window))
+            recent.append(call)
+            status = "error" if call.error else "ok"
+            self._increment("calls_total", labels + (("mode", call.mode), ("status", status)))
+            self._increment("retries_total", labels, call.retries)
+            for token_type, attribute in self.TOKEN_FIELDS:
+                self._increment("tokens_total", labels + (("type", token_type),), getattr(call, attribute))
+            if call.stop_reason:
+                self._increment("stop_reason_total", labels + (("stop_reason", call.stop_reason),))
+            if call.json_outcome:
+                self._increment("json_outcome_total", labels + (("outcome", call.json_outcome),))
+            if call.wall_seconds is not None:
+                self._increment("seconds_sum", labels, call.wall_seconds)
+                self._increment("seconds_count", labels)
+            if call.ttft_seconds is not None:
+                self._increment("ttft_seconds_sum", labels, call.ttft_seconds)
+                self._increment("ttft_seconds_count", labels)
+
+    def record_routing(self, evaluator: str, decision: Dict[str, Any]) -> None:
+        """段階的なモデル選択の結果（高速モデルで確定したか、評価し直したか）を数える。"""
+        outcome = "escalated" if decision["escalated"] else "accepted"
+        with self._lock:
+            self._increment("routing_total", (("evaluator", evaluator), ("outcome", outcome)))
+            if decision["saved_seconds"] is not None:
+                self._increment("routing_saved_seconds", (("evaluator", evaluator),), decision["saved_seconds"])
+
+    def median_seconds(self, evaluator: str, model: str) -> Optional[float]:
+        """直近の成功した呼び出しの所要時間の中央値。記録がなければ None。"""
+        with self._lock:
+            calls = list(self._recent.get((evaluator, model), ()))
+        wall = [call.wall_seconds for call in calls if call.wall_seconds is not None and not call.error]
+        return float(np.median(wall)) if wall else None
+
+    def routing_rows(self) -> List[Dict[str, Any]]:
+        """統計パネル用に、評価種別ごとのモデル選択の内訳をまとめる。"""
+        with self._lock:
+            counters = dict(self._counters)
+        evaluators = sorted({dict(labels)["evaluator"] for name, labels in counters if name == "routing_total"})
+        rows = []
+        for evaluator in evaluators:
+            accepted = counters.get(("routing_total", (("evaluator", evaluator), ("outcome", "accepted"))), 0)
+            escalated = counters.get(("routing_total", (("evaluator", evaluator), ("outcome", "escalated"))), 0)
+            rows.append(
+                {
+                    "評価": evaluator,
+                    "高速モデルで確定": int(accepted),
+                    "再評価": int(escalated),
+                    "再評価率": escalated / (accepted + escalated),
+                    "短縮見込み(秒)": counters.get(("routing_saved_seconds", (("evaluator", evaluator),)), 0.0),
+                }
+            )
+        return rows
+
+    def _increment(self, name: str, labels: Tuple[Tuple[str, str], ...], amount: float = 1) -> None:
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """統計パネル用に、モデル・評価種別ごとの直近の分布を1行ずつまとめる。"""
+        with self._lock:
+            groups = {key: list(recent) for key, recent in self._recent.items()}
+        rows = []
+        for (evaluator, model), calls in sorted(groups.items()):
+            wall = [call.wall_seconds for call in calls if call.wall_seconds is not None]
+            ttft = [call.ttft_seconds for call in calls if call.ttft_seconds is not None]
+            wall_p50, wall_p95, wall_p99 = np.percentile(wall, [50, 95, 99]).tolist() if wall else (None,) * 3
+            ttft_p50, ttft_p95, ttft_p99 = np.percentile(ttft, [50, 95, 99]).tolist() if ttft else (None,) * 3
+            parsed = [call for call in calls if call.json_outcome]
+            rows.append(
+                {
+                    "評価": evaluator,
+                    "モデル": model,
+                    "件数": len(calls),
+                    "エラー": sum(1 for call in calls if call.error),
+                    "再試行": sum(call.retries for call in calls),
+                    "所要p50(秒)": wall_p50,
+                    "所要p95(秒)": wall_p95,
+                    "所要p99(秒)": wall_p99,
+                    "初回トークンp50(秒)": ttft_p50,
+                    "初回トークンp95(秒)": ttft_p95,
+                    "初回トークンp99(秒)": ttft_p99,
+                    "入力トークン平均": float(np.mean([call.input_tokens for call in calls])),
+                    "出力トークン平均": float(np.mean([call.output_tokens for call in calls])),
+                    "キャッシュ読込平均": float(np.mean([call.cache_read_tokens for call in calls])),
+                    "上限到達(max_tokens)": sum(1 for call in calls if call.stop_reason == "max_tokens"),
+                    "JSON復元": sum(1 for call in parsed if call.json_outcome == "repaired"),
+                    "JSON失敗": sum(1 for call in parsed if call.json_outcome in ("failed", "invalid")),
+                }
+            )
+        return rows
+
+    def prometheus_text(self) -> str:
+        """Prometheusのテキスト形式で、累計カウンターと直近の所要時間の分位数を出力する。"""
+        with self._lock:
+            counters = dict(self._counters)
+            groups = {key: list(recent) for key, recent in self._recent.items()}
+
+        lines: List[str] = []
+
+        def emit_counter(name: str, help_text: str, metric_type: str = "counter") -> None:
+            samples = [(labels, value) for (counter, labels), value in counters.items() if counter == name]
+            if not samples:
+                return
+            lines.append(f"# HELP evaluation_{name} {help_text}")
+            lines.append(f"# TYPE evaluation_{name} {metric_type}")
+            for labels, value in sorted(samples):
+                lines.append(f"evaluation_{name}{format_prometheus_labels(labels)} {format_prometheus_value(value)}")
+
+        emit_counter("calls_total", "Evaluation API calls by mode and status.")
+        emit_counter("retries_total", "Retries performed by the request governor.")
+        emit_counter("tokens_total", "Tokens reported in the API usage field.")
+        emit_counter("stop_reason_total", "Responses by stop reason.")
+        emit_counter("json_outcome_total", "How the evaluation JSON was obtained from the response.")
+        emit_counter("routing_total", "Tiered routing outcomes: accepted from the fast model or escalated.")
+        # 評価し直した分は負の値になるため、カウンターではなくゲージとして出す
+        emit_counter("routing_saved_seconds", "Estimated latency saved by tiered routing.", "gauge")
+
+        for metric, attribute, help_text in (
+            ("seconds", "wall_seconds", "Wall time of evaluation calls including retries."),
+            ("ttft_seconds", "ttft_seconds", "Time to first streamed token."),
+        ):
+            lines.append(f"# HELP evaluation_{metric} {help_text}")
+            lines.append(f"# TYPE evaluation_{metric} summary")
+            for (evaluator, model), calls in sorted(groups.items()):
+                values = [getattr(call, attribute) for call in calls if getattr(call, attribute) is not None]
+                labels = (("evaluator", evaluator), ("model", model))
+                if values:
+                    for quantile, value in zip((0.5, 0.95, 0.99), np.percentile(values, [50, 95, 99])):
+                        quantile_labels = format_prometheus_labels(labels + (("quantile", str(quantile)),))
+                        lines.append(f"evaluation_{metric}{quantile_labels} {format_prometheus_value(value)}")
+                for suffix in ("sum", "count"):
+                    value = counters.get((f"{metric}_{suffix}", labels))
+                    if value is not None:
+                        lines.append(
+                            f"evaluation_{metric}_{suffix}{format_prometheus_labels(labels)} "
+                            f"{format_prometheus_value(value)}"
+                        )
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._counters.clear()
+
+
+def format_prometheus_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    escaped = []
+    for name, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def format_prometheus_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{float(value):.6g}"
+
+
+@st.cache_resource(show_spinner=False)
+def get_evaluation_telemetry() -> EvaluationTelemetry:
+    return EvaluationTelemetry(EVALUATION_TELEMETRY_WINDOW)
+
+
+class EvaluationCache:
+    """検証済みの評価結果を入力内容のハッシュで保存するSQLiteキャッシュ。
+
+    サーバープロセス内の全セッションで共有され、再起動後も残る。
+    件数上限を超えた分は最終参照が古い順に、保存期限を過ぎた分は参照時に削除する。
+    """
+
+    def __init__(self, path: str, *, max_entries: int, max_age_seconds: float) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS evaluation_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    evaluator TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_evaluation_cache_last_access "
+                "ON evaluation_cache (last_access)"
+            )
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM evaluation_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is not None and now - row[1] > self.max_age_seconds:
+                self._conn.execute("DELETE FROM evaluation_cache WHERE cache_key = ?", (cache_key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE evaluation_cache SET last_access = ? WHERE cache_key = ?",
+                (now, cache_key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, cache_key: str, evaluator: str, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluation_cache "
+                "(cache_key, evaluator, payload, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (cache_key, evaluator, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM evaluation_cache WHERE created_at < ?",
+                (now - self.max_age_seconds,),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM evaluation_cache WHERE cache_key IN (
+                    SELECT cache_key FROM evaluation_cache
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM evaluation_cache")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM evaluation_cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+@st.cache_resource(show_spinner=False)
+def get_evaluation_cache() -> EvaluationCache:
+    return EvaluationCache(
+        EVALUATION_CACHE_PATH,
+        max_entries=EVALUATION_CACHE_MAX_ENTRIES,
+        max_age_seconds=EVALUATION_CACHE_MAX_AGE_SECONDS,
+    )
+
+
+def make_evaluation_cache_key(
+    evaluator: str,
+    inputs: Dict[str, str],
+    *,
+    model: str,
+    max_tokens: int,
+) -> str:
+    normalized_inputs = [[label, (value or "").strip()] for label, value in inputs.items()]
+    material = json.dumps(
+        {
+            "evaluator": evaluator,
+            "template_version": PROMPT_TEMPLATE_VERSION,
+            "model": model,
+            "max_tokens": max_tokens,
+            "inputs": normalized_inputs,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def cached_evaluation(
+    spec: "EvaluatorSpec",
+    inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback] = None,
+) -> Dict[str, Any]:
+    """キャッシュに同じ入力の評価があれば返し、なければClaudeで評価して保存する。
+
+    on_entry を渡すとストリーミングで評価し、観点の評価が届くたびに呼び出す。
+    キャッシュヒット時は保存済みの全観点をまとめて渡す。
+    """
+    inputs = spec.prepare_inputs(inputs)
+    cache = get_evaluation_cache()
+    large_key = make_evaluation_cache_key(spec.name, inputs, model=EVALUATION_MODEL, max_tokens=spec.max_tokens)
+    cache_key = make_evaluation_cache_key(
+        spec.name, inputs, model=evaluation_cache_model(), max_tokens=spec.max_tokens
+    )
+    # 大きいモデルの評価が保存済みなら、段階的な選択でも高速モデルを呼ばずにそれを使う
+    payload = cache.get(large_key)
+    if payload is None and cache_key != large_key:
+        payload = cache.get(cache_key)
+    if payload is not None:
+        if on_entry is not None:
+            for section_key, _, labels in spec.sections:
+                for label in labels:
+                    on_entry(section_key, label, payload[section_key][label])
+        return payload
+    payload = route_evaluation(spec, inputs, on_entry)
+    cache.put(cache_key, spec.name, payload)
+    decision = payload.get("routing", {}).get(spec.name)
+    if decision is not None and decision["model"] == EVALUATION_MODEL:
+        # EVALUATION_MODEL で確定した評価は、常に大きいモデルを使う設定やバッチ評価からも再利用できる
+        cache.put(large_key, spec.name, payload)
+    return payload
+
+
+def tiered_routing_enabled() -> bool:
+    """段階的なモデル選択を使うか。
+
+    "tiered" でも EVALUATION_FAST_MODEL が未指定なら、APIキーの未設定と同じく ValueError にして画面に表示する。
+    """
+    if EVALUATION_ROUTING != "tiered":
+        return False
+    if not EVALUATION_FAST_MODEL:
+        raise ValueError("EVALUATION_ROUTING=tiered には環境変数 EVALUATION_FAST_MODEL の指定が必要です。")
+    return True
+
+
+def evaluation_cache_model() -> str:
+    """評価キャッシュのキーに含めるモデル。段階的な選択では再評価の判定条件も含める。"""
+    if not tiered_routing_enabled():
+        return EVALUATION_MODEL
+    return (
+        f"{EVALUATION_FAST_MODEL}>{EVALUATION_MODEL}"
+        f"(±{EVALUATION_ESCALATION_MARGIN},{EVALUATION_MIN_REASON_CHARS})"
+    )
+
+
+def route_evaluation(
+    spec: "EvaluatorSpec",
+    inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback] = None,
+) -> Dict[str, Any]:
+    """EVALUATION_ROUTING に従ってモデルを選んで評価する。
+
+    段階的な選択では高速モデルの結果を escalation_reason で判定し、理由があれば EVALUATION_MODEL で
+    評価し直す。判定結果と短縮できた時間の見込みは payload["routing"][評価器の名前] に残す。
+    ストリーミング中に評価し直した場合、観点のスコアカードは大きいモデルの結果で上書きされる。
+    評価し直すのは escalation_reason の条件（境界付近の平均・短い根拠・出力の途切れや修復）に当てはまる場合と、
+    高速モデルの応答のJSON抽出・検証に失敗した場合（ValueError）。API・設定のエラーは評価し直さずに送出する。
+    """
+    if not tiered_routing_enabled():
+        payload, _ = evaluate_with_model(spec, inputs, on_entry, EVALUATION_MODEL)
+        return payload
+
+    # APIキーの未設定などは ValueError でも評価し直さず、高速モデルを呼ぶ前に送出する
+    get_anthropic_client()
+    started = time.monotonic()
+    try:
+        payload, call = evaluate_with_model(spec, inputs, on_entry, EVALUATION_FAST_MODEL)
+        reason = escalation_reason(spec, payload, call)
+    except ValueError as exc:  # JSONの抽出・スキーマ検証の失敗は、大きいモデルで評価し直す
+        reason = f"高速モデルの応答が不正（{type(exc).__name__}）"
+    fast_seconds = time.monotonic() - started
+    decision: Dict[str, Any] = {
+        "model": EVALUATION_FAST_MODEL,
+        "escalated": False,
+        "reason": None,
+        "fast_seconds": round(fast_seconds, 3),
+        "large_seconds": None,
+        "saved_seconds": None,
+    }
+    telemetry = get_evaluation_telemetry()
+    if reason is None:
+        expected_seconds = telemetry.median_seconds(spec.name, EVALUATION_MODEL)
+        if expected_seconds is not None:
+            decision["saved_seconds"] = round(expected_seconds - fast_seconds, 3)
+    else:
+        started = time.monotonic()
+        payload, _ = evaluate_with_model(spec, inputs, on_entry, EVALUATION_MODEL)
+        decision.update(
+            model=EVALUATION_MODEL,
+            escalated=True,
+            reason=reason,
+            large_seconds=round(time.monotonic() - started, 3),
+            # 最初から大きいモデルを使った場合より、高速モデルの分だけ遅くなる
+            saved_seconds=-round(fast_seconds, 3),
+        )
+    telemetry.record_routing(spec.name, decision)
+    return {**payload, "routing": {spec.name: decision}}
+
+
+def escalation_reason(spec: "EvaluatorSpec", payload: Dict[str, Any], call: "EvaluationCallRecord") -> Optional[str]:
+    """高速モデルの評価を大きいモデルで評価し直すべき理由。そのまま確定してよければ None。"""
+    if call.stop_reason == "max_tokens" or call.json_outcome == "repaired":
+        return "出力の形式が不完全"
+    entries = [payload[section_key][label] for section_key, _, labels in spec.sections for label in labels]
+    if any(len(str(entry["reason"]).strip()) < EVALUATION_MIN_REASON_CHARS for entry in entries):
+        return "根拠が短く確信度が低い"
+    section_means = [
+        sum(payload[section_key][label]["score"] for label in labels) / len(labels)
+        for section_key, _, labels in spec.sections
+    ]
+    mean = sum(section_means) / len(section_means)
+    if any(abs(mean - boundary) <= EVALUATION_ESCALATION_MARGIN for boundary in SCORE_BAND_BOUNDARIES):
+        return f"平均{mean:.2f}点がスコア帯の境界付近"
+    return None
+
+
+def evaluate_with_model(
+    spec: "EvaluatorSpec",
+    inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback],
+    model: str,
+) -> Tuple[Dict[str, Any], "EvaluationCallRecord"]:
+    if on_entry is None:
+        return request_evaluation(spec, inputs, model=model)
+    return stream_evaluation(spec, inputs, on_entry, model=model)
+
+
+@st.cache_resource(show_spinner=False)
+def get_section_executor() -> ThreadPoolExecutor:
+    """設問ごとの評価を並列に実行するスレッドプール。
+
+    受講者単位の評価（get_evaluation_executor）の中から使うため、別のプールにして待ち合わせによる詰まりを避ける。
+    実際の同時リクエスト数は RequestGovernor が調整する。
+    """
+    return ThreadPoolExecutor(
+        max_workers=BULK_EVALUATION_MAX_WORKERS * len(GROUP_TRAINING_RUBRICS),
+        thread_name_prefix="evaluation-section",
+    )
+
+
+def evaluate_sections_concurrently(
+    specs: Tuple["EvaluatorSpec", ...],
+    inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback] = None,
+) -> Dict[str, Any]:
+    """設問ごとの評価を同時に発行し、1名分の評価にまとめる。
+
+    所要時間は最も遅い設問の評価とほぼ同じになる。失敗した設問は section_errors に記録し、
+    ほかの設問の結果は残す。on_entry は呼び出し元のスレッドで呼ぶ（ワーカーからは受信箱経由で渡す）。
+    """
+    entries: "queue.Queue[Tuple[str, str, Dict[str, Any]]]" = queue.Queue()
+    forward = None if on_entry is None else (lambda section, label, entry: entries.put((section, label, entry)))
+    executor = get_section_executor()
+    futures = {executor.submit(cached_evaluation, spec, inputs, forward): spec for spec in specs}
+
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=0.1 if on_entry else None)
+        while on_entry is not None and not entries.empty():
+            on_entry(*entries.get_nowait())
+
+    payloads: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for future, spec in futures.items():
+        try:
+            payloads[spec.name] = future.result()
+        except Exception as exc:  # 設問単位の失敗として記録し、ほかの設問の結果は残す
+            errors[spec.name] = str(exc) or type(exc).__name__
+    return merge_section_evaluations(specs, payloads, errors)
+
+
+def merge_section_evaluations(
+    specs: Tuple["EvaluatorSpec", ...],
+    payloads: Dict[str, Dict[str, Any]],
+    errors: Dict[str, str],
+) -> Dict[str, Any]:
+    """設問ごとの評価を1つにまとめる。すべての設問が失敗した場合は ValueError。"""
+    if not payloads:
+        details = " / ".join(f"{name}: {message}" for name, message in errors.items())
+        raise ValueError(f"すべての設問の評価に失敗しました（{details}）")
+    merged: Dict[str, Any] = {}
+    section_summaries: Dict[str, str] = {}
+    section_errors: Dict[str, str] = {}
+    for spec in specs:
+        for section_key, _, _ in spec.sections:
+            if spec.name in payloads:
+                merged[section_key] = payloads[spec.name][section_key]
+                section_summaries[section_key] = payloads[spec.name]["overall_summary"]
+            else:
+                section_errors[section_key] = errors.get(spec.name, "不明なエラー")
+    merged["section_summaries"] = section_summaries
+    routing = {name: decision for payload in payloads.values() for name, decision in payload.get("routing", {}).items()}
+    if routing:
+        merged["routing"] = routing
+    merged["overall_summary"] = "\n".join(
+        f"{GROUP_TRAINING_FIELD_LABELS.get(section_key, section_key)}: {summary}"
+        for section_key, summary in section_summaries.items()
+    )
+    if section_errors:
+        merged["section_errors"] = section_errors
+    return merged
+
+
+class CohortScoreMatrix:
+    """受講者×評価観点のスコア行列。
+
+    行は名簿の並び順、列は (セクション, 観点) の組。未評価の行はNaNのまま保持し、
+    集計は評価済みの行だけを対象にNumPyの一括演算で行う。
+    """
+
+    def __init__(self, columns: List[Tuple[str, str]], capacity: int = 64) -> None:
+        self.columns = list(columns)
+        self.size = 0
+        self._scores = np.full((max(capacity, 1), len(self.columns)), np.nan)
+        self._evaluated = np.zeros(max(capacity, 1), dtype=bool)
+
+    @classmethod
+    def from_records(cls, columns: List[Tuple[str, str]], records: List[Any]) -> "CohortScoreMatrix":
+        matrix = cls(columns, capacity=len(records))
+        for record in records:
+            matrix.append(record.evaluation)
+        return matrix
+
+    def append(self, evaluation: Optional[Dict[str, Any]] = None) -> None:
+        if self.size == len(self._scores):
+            self._scores = np.vstack([self._scores, np.full_like(self._scores, np.nan)])
+            self._evaluated = np.concatenate([self._evaluated, np.zeros_like(self._evaluated)])
+        self.size += 1
+        if evaluation:
+            self.set_row(self.size - 1, evaluation)
+
+    def set_row(self, index: int, evaluation: Dict[str, Any]) -> None:
+        # 評価に失敗した設問の観点はNaNのまま残し、集計から除く
+        self._scores[index] = [
+            evaluation[section][label]["score"] if section in evaluation else np.nan
+            for section, label in self.columns
+        ]
+        self._evaluated[index] = True
+
+    @property
+    def evaluated_indices(self) -> np.ndarray:
+        return np.flatnonzero(self._evaluated[: self.size])
+
+    @property
+    def evaluated_count(self) -> int:
+        return int(self._evaluated[: self.size].sum())
+
+    def section_columns(self, section: Optional[str] = None) -> np.ndarray:
+        return np.array(
+            [i for i, (column_section, _) in enumerate(self.columns) if section in (None, column_section)],
+            dtype=int,
+        )
+
+    def scores_slice(self, start: int, stop: int) -> np.ndarray:
+        """名簿の start〜stop 行目のスコア（未評価はNaN）。"""
+        return self._scores[start : min(stop, self.size)]
+
+    def evaluated_scores(self, section: Optional[str] = None) -> np.ndarray:
+        """評価済みの行だけを取り出した (評価済み人数 × 観点数) の行列。"""
+        return self._scores[self.evaluated_indices][:, self.section_columns(section)]
+
+    def criterion_means(self, section: Optional[str] = None) -> np.ndarray:
+        return nan_mean(self.evaluated_scores(section), axis=0)
+
+    def participant_means(self, section: Optional[str] = None) -> np.ndarray:
+        return nan_mean(self.evaluated_scores(section), axis=1)
+
+    def percentiles(self, q: List[float], section: Optional[str] = None) -> np.ndarray:
+        """評価済み受講者の平均スコアの分布に対するパーセンタイル。"""
+        return np.percentile(self.participant_means(section), q)
+
+
+def nan_mean(values: np.ndarray, axis: int) -> np.ndarray:
+    """NaN（評価に失敗した設問の観点）を除いた平均。値が1つもなければNaN。"""
+    counts = np.count_nonzero(~np.isnan(values), axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.nansum(values, axis=axis) / counts
+
+
+def summarize_evaluation(columns: List[Tuple[str, str]], evaluation: Dict[str, Any]) -> EvaluationSummary:
+    """セクション別平均・総合スコア（セクション平均の平均）・最高/最低の観点を求める。
+
+    評価に失敗したセクション（評価に含まれないセクション）は集計から除く。
+    """
+    section_scores: Dict[str, List[int]] = {}
+    entries: List[Tuple[str, int]] = []
+    for section, label in columns:
+        if section not in evaluation:
+            continue
+        score = evaluation[section][label]["score"]
+        section_scores.setdefault(section, []).append(score)
+        entries.append((label, score))
+    section_averages = {section: sum(scores) / len(scores) for section, scores in section_scores.items()}
+    return EvaluationSummary(
+        section_averages=section_averages,
+        overall_score=sum(section_averages.values()) / len(section_averages),
+        top=max(entries, key=lambda item: item[1]),
+        growth=min(entries, key=lambda item: item[1]),
+    )
+
+
+class ParticipantStore:
+    """受講者・入力内容・評価結果を保存するSQLiteストア。
+
+    サーバープロセス内の全セッションで同じ名簿を共有し、ブラウザの再読み込みや再起動後も残る。
+    名簿は種別ごとに初回アクセス時に1回だけ読み込み、以降はメモリ上のレコードを直接参照する。
+    書き込みは背景スレッドが一定間隔でまとめ、1トランザクションで反映する。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        record_factories: Dict[str, Callable[..., Any]],
+        score_columns: Dict[str, List[Tuple[str, str]]],
+        *,
+        flush_interval: float,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.record_factories = record_factories
+        self.score_columns = score_columns
+        self.flush_interval = flush_interval
+        # 名簿が変わるたびに増える番号（セッションごとの集計結果の再利用判定に使う）
+        self.revision = 0
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._records: Dict[str, List[Any]] = {}
+        self._matrices: Dict[str, CohortScoreMatrix] = {}
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._wake = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._write_lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS participants (
+                    participant_id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_kind_position "
+                "ON participants (kind, position)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS participant_inputs (
+                    participant_id INTEGER NOT NULL REFERENCES participants (participant_id),
+                    field_order INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (participant_id, field_order)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS evaluations (
+                    participant_id INTEGER PRIMARY KEY REFERENCES participants (participant_id),
+                    payload TEXT NOT NULL,
+                    evaluated_at REAL NOT NULL
+                )
+                """
+            )
+            self._next_id = self._conn.execute(
+                "SELECT COALESCE(MAX(participant_id), 0) + 1 FROM participants"
+            ).fetchone()[0]
+        threading.Thread(target=self._flush_loop, name="participant-store-writer", daemon=True).start()
+
+    def records(self, kind: str) -> List[Any]:
+        with self._lock:
+            if kind not in self._records:
+                self._records[kind] = self._load(kind)
+                self._matrices[kind] = CohortScoreMatrix.from_records(
+                    self.score_columns[kind], self._records[kind]
+                )
+                for record in self._records[kind]:
+                    if record.evaluation:
+                        record.summary = summarize_evaluation(self.score_columns[kind], record.evaluation)
+                self._refresh_ranks(kind)
+            return self._records[kind]
+
+    def _refresh_ranks(self, kind: str) -> None:
+        """総合スコアの降順で順位を振り直す（同点は同順位）。"""
+        records = self._records[kind]
+        indices = [index for index, record in enumerate(records) if record.summary is not None]
+        overall = np.array([records[index].summary.overall_score for index in indices])
+        # 自分より高いスコアの人数 + 1 が順位になる
+        ranks = len(overall) - np.searchsorted(np.sort(overall), overall, side="right") + 1
+        for index, rank in zip(indices, ranks):
+            records[index].summary.rank = int(rank)
+            records[index].summary.cohort_size = len(indices)
+
+    def score_matrix(self, kind: str) -> CohortScoreMatrix:
+        """名簿と同じ並びのスコア行列。登録・評価のたびにその行だけ更新される。"""
+        with self._lock:
+            self.records(kind)
+            return self._matrices[kind]
+
+    def _load(self, kind: str) -> List[Any]:
+        with self._write_lock:
+            rows = self._conn.execute(
+                "SELECT participant_id, name FROM participants WHERE kind = ? ORDER BY position",
+                (kind,),
+            ).fetchall()
+            input_rows = self._conn.execute(
+                """
+                SELECT i.participant_id, i.label, i.value
+                FROM participant_inputs AS i JOIN participants AS p USING (participant_id)
+                WHERE p.kind = ? ORDER BY i.participant_id, i.field_order
+                """,
+                (kind,),
+            ).fetchall()
+            evaluation_rows = self._conn.execute(
+                """
+                SELECT e.participant_id, e.payload
+                FROM evaluations AS e JOIN participants AS p USING (participant_id)
+                WHERE p.kind = ?
+                """,
+                (kind,),
+            ).fetchall()
+
+        inputs: Dict[int, Dict[str, str]] = {}
+        for participant_id, label, value in input_rows:
+            inputs.setdefault(participant_id, {})[label] = value
+        evaluations = {participant_id: json.loads(payload) for participant_id, payload in evaluation_rows}
+        factory = self.record_factories[kind]
+        return [
+            factory(
+                name=name,
+                inputs=inputs.get(participant_id, {}),
+                evaluation=evaluations.get(participant_id),
+                record_id=participant_id,
+            )
+            for participant_id, name in rows
+        ]
+
+    def add(self, kind: str, name: str, inputs: Dict[str, str]) -> int:
+        """受講者を名簿の末尾に追加し、その位置を返す。"""
+        with self._lock:
+            records = self.records(kind)
+            record = self.record_factories[kind](name=name, inputs=inputs, record_id=self._next_id)
+            self._next_id += 1
+            self._pending.append(
+                (
+                    "INSERT INTO participants (participant_id, kind, position, name, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (record.record_id, kind, len(records), name, time.time()),
+                )
+            )
+            for field_order, (label, value) in enumerate(inputs.items()):
+                self._pending.append(
+                    (
+                        "INSERT INTO participant_inputs (participant_id, field_order, label, value) "
+                        "VALUES (?, ?, ?, ?)",
+                        (record.record_id, field_order, label, value or ""),
+                    )
+                )
+            records.append(record)
+            self._matrices[kind].append()
+            self.revision += 1
+            index = len(records) - 1
+        self._wake.set()
+        return index
+
+    def set_evaluation(self, kind: str, index: int, evaluation: Dict[str, Any]) -> Any:
+        with self._lock:
+            record = self.records(kind)[index]
+            record.evaluation = evaluation
+            record.summary = summarize_evaluation(self.score_columns[kind], evaluation)
+            self._matrices[kind].set_row(index, evaluation)
+            self._refresh_ranks(kind)
+            self._pending.append(
+                (
+                    "INSERT OR REPLACE INTO evaluations (participant_id, payload, evaluated_at) "
+                    "VALUES (?, ?, ?)",
+                    (record.record_id, json.dumps(evaluation, ensure_ascii=False), time.time()),
+                )
+            )
+            self.revision += 1
+        self._wake.set()
+        return record
+
+    def flush(self) -> None:
+        """未反映の書き込みを1トランザクションでSQLiteへ反映する。
+
+        ロックは records からの _load と同じく常に _lock → _write_lock の順で取る。
+        取り出した順に反映されるよう、_write_lock を取ってから _lock を放し、書き込み中は名簿をロックしない。
+        未反映がなくても _write_lock を待つため、戻った時点でほかのスレッドの書き込みも終わっている。
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._write_lock.acquire()
+        try:
+            if pending:
+                with self._conn:
+                    for statement, parameters in pending:
+                        self._conn.execute(statement, parameters)
+        finally:
+            self._write_lock.release()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            # 短時間に続く登録・評価をまとめて書き込むため、少し待ってから反映する
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+# スコア行列・集計値の列（セクション, 観点）
+SCORE_COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    "succession": [("competency", label) for label, _ in COMPETENCY_LABELS]
+    + [("readiness", label) for label, _ in READINESS_LABELS],
+    "group_training": [
+        (section_key, label) for section_key, criteria in GROUP_TRAINING_RUBRICS.items() for label in criteria
+    ],
+}
+
+
+@st.cache_resource(show_spinner=False)
+def get_participant_store() -> ParticipantStore:
+    store = ParticipantStore(
+        PARTICIPANT_STORE_PATH,
+        {"succession": StudentRecord, "group_training": GroupTrainingParticipant},
+        SCORE_COLUMNS,
+        flush_interval=PARTICIPANT_STORE_FLUSH_SECONDS,
+    )
+    atexit.register(store.flush)
+    return store
 
 
 def inject_global_styles() -> None:
@@ -265,88 +1702,302 @@ def inject_global_styles() -> None:
     )
 
 
+class JsonExtractionError(ValueError):
+    """応答テキストからJSONを取り出せなかったことを、失敗位置とともに表す。"""
+
+    def __init__(self, message: str, *, offset: int, byte_offset: int) -> None:
+        super().__init__(f"{message}（位置: {offset}文字目 / {byte_offset}バイト目）")
+        self.reason = message
+        self.offset = offset
+        self.byte_offset = byte_offset
+
+
+class IncrementalJsonScanner:
+    """分割して届くテキストから、最初のトップレベルJSONオブジェクトを1パスで切り出す。
+
+    文字列リテラルとエスケープを解釈するため、評価根拠の中の「{」「}」や「"」で
+    入れ子の深さがずれることはない。閉じたオブジェクトはキーのパスとともに記録され、
+    ストリーミング中に観点ごとの評価を取り出すのに使える。
+    """
+
+    _STRUCTURAL = re.compile(r'[{}\[\]":]')
+    _STRING_SPECIAL = re.compile(r'["\\]')
+    _CLOSERS = {"}": "{", "]": "["}
+
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._chunk_starts: List[int] = []
+        self.length = 0
+        # (開き括弧, その値が対応するキー, 開始位置)
+        self._stack: List[Tuple[str, Optional[str], int]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._completed: List[Tuple[Tuple[str, ...], int, int]] = []
+        self.object_start: Optional[int] = None
+        self.object_end: Optional[int] = None
+        self.error: Optional[Tuple[str, int]] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.object_end is not None or self.error is not None
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        base = self.length
+        self._chunks.append(chunk)
+        self._chunk_starts.append(base)
+        self.length += len(chunk)
+        if self.finished:
+            return
+
+        idx = 0
+        size = len(chunk)
+        while idx < size:
+            if self._escape:
+                self._escape = False
+                idx += 1
+                continue
+            if self._in_string:
+                match = self._STRING_SPECIAL.search(chunk, idx)
+                if match is None:
+                    return
+                idx = match.start()
+                if chunk[idx] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    self._last_string = self.slice(self._string_start + 1, base + idx)
+                idx += 1
+                continue
+            if not self._stack:
+                # トップレベルのオブジェクトが始まるまでの前置きの文章は読み飛ばす
+                idx = chunk.find("{", idx)
+                if idx == -1:
+                    return
+                self.object_start = base + idx
+                self._stack.append(("{", None, base + idx))
+                idx += 1
+                continue
+
+            match = self._STRUCTURAL.search(chunk, idx)
+            if match is None:
+                return
+            idx = match.start()
+            char = chunk[idx]
+            if char == '"':
+                self._in_string = True
+                self._string_start = base + idx
+            elif char == ":":
+                self._pending_key = self._last_string
+            elif char in "{[":
+                key = self._pending_key if self._stack[-1][0] == "{" else None
+                self._stack.append((char, key, base + idx))
+                self._pending_key = None
+            else:
+                opener, key, start = self._stack.pop()
+                if opener != self._CLOSERS[char]:
+                    self.error = (f"括弧の対応が不正です（{opener} に対して {char}）", base + idx)
+                    return
+                self._pending_key = None
+                if char == "}":
+                    path = tuple(k for _, k, _ in self._stack[1:] if k is not None)
+                    if key is not None:
+                        path += (key,)
+                    self._completed.append((path, start, base + idx + 1))
+                if not self._stack:
+                    self.object_end = base + idx + 1
+                    return
+            idx += 1
+
+    def slice(self, start: int, end: int) -> str:
+        """受け取ったテキスト全体の [start, end) を、該当するチャンクだけを連結して返す。"""
+        first = bisect.bisect_right(self._chunk_starts, start) - 1
+        parts = []
+        for chunk_index in range(max(first, 0), len(self._chunks)):
+            chunk_start = self._chunk_starts[chunk_index]
+            if chunk_start >= end:
+                break
+            chunk = self._chunks[chunk_index]
+            parts.append(chunk[max(start - chunk_start, 0) : end - chunk_start])
+        return "".join(parts)
+
+    def pop_completed_objects(self) -> List[Tuple[Tuple[str, ...], str]]:
+        """前回の呼び出し以降に閉じたオブジェクトを (キーのパス, JSONテキスト) で返す。"""
+        completed = [(path, self.slice(start, end)) for path, start, end in self._completed]
+        self._completed = []
+        return completed
+
+    def byte_offset(self, offset: int) -> int:
+        return len(self.slice(0, offset).encode("utf-8"))
+
+    def result(self) -> str:
+        """最初のトップレベルオブジェクトのテキスト。取り出せない場合は JsonExtractionError。"""
+        if self.object_end is not None:
+            return self.slice(self.object_start, self.object_end)
+        if self.error is not None:
+            message, offset = self.error
+        elif self.object_start is None:
+            message, offset = "JSONオブジェクトの開始「{」が見つかりません", self.length
+        else:
+            message, offset = "JSONオブジェクトが閉じられていません", self.length
+        raise JsonExtractionError(message, offset=offset, byte_offset=self.byte_offset(offset))
+
+
 def extract_json_from_text(text: str) -> Optional[str]:
-    start = text.find("{")
-    if start == -1:
+    scanner = IncrementalJsonScanner()
+    scanner.feed(text)
+    try:
+        return scanner.result()
+    except JsonExtractionError:
         return None
-    depth = 0
-    for idx, char in enumerate(text[start:], start=start):
-        if char == "{":
-            depth += 1
-        elif char == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start : idx + 1]
-    return None
 
 
-def call_claude(student_inputs: Dict[str, str]) -> Dict[str, Dict[str, Dict[str, str]]]:
-    client = get_anthropic_client()
+def extract_response_text(response: Any) -> str:
+    if not response.content:
+        raise ValueError("Claudeの応答が空でした。")
 
-    system_prompt = (
+    text_content = "".join(part.text for part in response.content if hasattr(part, "text"))
+    if not text_content:
+        raise ValueError("Claudeの応答にテキストが含まれていません。")
+    return text_content
+
+
+def parse_json_response(text_content: str) -> Dict[str, Any]:
+    try:
+        return json.loads(text_content)
+    except json.JSONDecodeError:
+        pass
+
+    scanner = IncrementalJsonScanner()
+    scanner.feed(text_content)
+    preview = text_content[:200].replace("\n", " ")
+    try:
+        json_candidate = scanner.result()
+        return json.loads(json_candidate)
+    except JsonExtractionError as exc:
+        raise JsonExtractionError(
+            f"Claudeの応答をJSONとして解釈できませんでした（{exc.reason}）。応答内容: {preview}",
+            offset=exc.offset,
+            byte_offset=exc.byte_offset,
+        ) from exc
+    except json.JSONDecodeError as exc:
+        offset = scanner.object_start + exc.pos
+        raise JsonExtractionError(
+            f"Claudeの応答のJSONが不正です（{exc.msg}）。応答内容: {preview}",
+            offset=offset,
+            byte_offset=scanner.byte_offset(offset),
+        ) from exc
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """評価プロンプトの静的部分（システム文・評価基準・JSON構造）と入力見出し。
+
+    静的部分は受講者によらず同一なので、cache_control のブレークポイントを置いて
+    プロンプトキャッシュの対象にし、受講者ごとに変わる入力ブロックだけを後ろに付ける。
+    キャッシュのプレフィックスはツール定義・システム文・評価基準の順に並ぶため、ブレークポイントはその末尾になる。
+    """
+
+    system_prompt: str
+    rubric_prompt: str
+    inputs_heading: str
+
+    def system_blocks(self) -> List[Dict[str, Any]]:
+        return [{"type": "text", "text": self.system_prompt}]
+
+    def user_content(self, inputs: Dict[str, str]) -> List[Dict[str, Any]]:
+        input_block = []
+        for section, value in inputs.items():
+            input_block.append(f"### {section}\n{value.strip() or '未記入'}")
+        joined_inputs = "\n\n".join(input_block)
+        return [
+            {"type": "text", "text": self.rubric_prompt, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": f"{self.inputs_heading}\n{joined_inputs}"},
+        ]
+
+
+def build_json_schema_block(sections: List[Tuple[str, List[str]]], summary_hint: str) -> str:
+    lines = ["{"]
+    for section_key, labels in sections:
+        lines.append(f'  "{section_key}": {{')
+        lines.append(",\n".join(f'    "{label}": {{"score": 1-5, "reason": "..."}}' for label in labels))
+        lines.append("  },")
+    lines.append(f'  "overall_summary": "{summary_hint}"')
+    lines.append("}")
+    return "\n".join(lines)
+
+
+SUCCESSION_PROMPT = PromptTemplate(
+    system_prompt=(
         "You are an executive coaching assistant. Evaluate participants "
         "in Japanese, returning concise, actionable feedback."
+    ),
+    rubric_prompt=(
+        "\nあなたは経営リーダー育成プログラムの評価者です。以下の受講生の入力内容をもとに、各カテゴリを5点満点の整数で評価し、"
+        "点数の根拠を明確に説明してください。根拠には「どのような行動・思考ができている／不足しているため何点なのか」を端的に示してください。"
+        "必ず以下のJSONフォーマットのみを出力し、余計な説明は付けないでください。スコアは1〜5の整数を使用してください。\n\n"
+        "期待するJSON構造:\n"
+        + build_json_schema_block(
+            [
+                ("competency", [label for label, _ in COMPETENCY_LABELS]),
+                ("readiness", [label for label, _ in READINESS_LABELS]),
+            ],
+            "受講生の全体まとめ",
+        )
+        + "\n"
+    ),
+    inputs_heading="受講生の入力:",
+)
+
+SUCCESSION_MAX_TOKENS = rubric_max_tokens(len(COMPETENCY_LABELS) + len(READINESS_LABELS))
+
+
+def build_group_training_section_prompt(section_key: str, criteria: List[str]) -> PromptTemplate:
+    title = GROUP_TRAINING_FIELD_LABELS[section_key]
+    return PromptTemplate(
+        system_prompt=(
+            "You are an experienced facilitator for management training. "
+            "Score participants' written answers in Japanese."
+        ),
+        rubric_prompt=(
+            f"\nあなたは管理職研修の評価者です。以下の受講者の「{title}」に対する記述を分析し、"
+            f"{len(criteria)}観点を5点満点の整数で評価してください。"
+            "各観点について、観点ごとの行動や記述の有無を踏まえた評価根拠を簡潔に記載してください。"
+            "必ず下記のJSONフォーマットのみを出力し、余分な文章は含めないでください。\n\n"
+            "期待するJSON構造:\n"
+            + build_json_schema_block([(section_key, criteria)], "この設問の記述全体を踏まえた講評")
+            + "\n"
+        ),
+        inputs_heading="受講者の入力:",
     )
 
-    input_block = []
-    for section, value in student_inputs.items():
-        input_block.append(f"### {section}\n{value.strip() or '未記入'}")
-    joined_inputs = "\n\n".join(input_block)
-
-    user_prompt = f"""
-あなたは経営リーダー育成プログラムの評価者です。以下の受講生の入力内容をもとに、各カテゴリを5点満点の整数で評価し、点数の根拠を明確に説明してください。根拠には「どのような行動・思考ができている／不足しているため何点なのか」を端的に示してください。必ず以下のJSONフォーマットのみを出力し、余計な説明は付けないでください。スコアは1〜5の整数を使用してください。
-
-期待するJSON構造:
-{{
-  "competency": {{
-    "戦略構想力": {{"score": 1-5, "reason": "..."}},
-    "価値創出力": {{"score": 1-5, "reason": "..."}},
-    "組織運営力": {{"score": 1-5, "reason": "..."}},
-    "実行力": {{"score": 1-5, "reason": "..."}},
-    "学習・適用力": {{"score": 1-5, "reason": "..."}}
-  }},
-  "readiness": {{
-    "キャリアビジョン": {{"score": 1-5, "reason": "..."}},
-    "使命感・志": {{"score": 1-5, "reason": "..."}},
-    "ネットワーク形成力": {{"score": 1-5, "reason": "..."}}
-  }},
-  "overall_summary": "受講生の全体まとめ"
-}}
-
-受講生の入力:
-{joined_inputs}
-"""
 
-    response = client.messages.create(
-        model="claude-opus-4-20250514",
-        max_tokens=1200,
-        system=system_prompt,
-        messages=[
+def call_claude(
+    student_inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback] = None,
+) -> Dict[str, Dict[str, Dict[str, str]]]:
+    return cached_evaluation(SUCCESSION_EVALUATOR, student_inputs, on_entry)
+
+
+def build_succession_request(student_inputs: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "model": EVALUATION_MODEL,
+        "max_tokens": SUCCESSION_MAX_TOKENS,
+        "system": SUCCESSION_PROMPT.system_blocks(),
+        "messages": [
             {
                 "role": "user",
-                "content": user_prompt,
+                "content": SUCCESSION_PROMPT.user_content(student_inputs),
             }
         ],
-    )
+    }
 
-    if not response.content:
-        raise ValueError("Claudeの応答が空でした。")
-
-    text_content = "".join(part.text for part in response.content if hasattr(part, "text"))
-    if not text_content:
-        raise ValueError("Claudeの応答にテキストが含まれていません。")
-
-    try:
-        payload = json.loads(text_content)
-    except json.JSONDecodeError:
-        json_candidate = extract_json_from_text(text_content)
-        if json_candidate is None:
-            preview = text_content[:200].replace("\n", " ")
-            raise ValueError(
-                f"Claudeの応答をJSONとして解釈できませんでした。応答内容: {preview}"
-            )
-        payload = json.loads(json_candidate)
 
+def validate_succession_payload(payload: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, str]]]:
     for section in ("competency", "readiness"):
         if section not in payload:
             raise ValueError(f"Claudeの応答に{section}セクションがありません。")
@@ -361,186 +2012,1125 @@ def call_claude(student_inputs: Dict[str, str]) -> Dict[str, Dict[str, Dict[str,
     return payload
 
 
-def call_goal_setting_evaluation(participant_inputs: Dict[str, str]) -> Dict[str, Any]:
+def call_group_training_evaluation(
+    participant_inputs: Dict[str, str],
+    on_entry: Optional[ScoreEntryCallback] = None,
+) -> Dict[str, Any]:
+    return evaluate_sections_concurrently(GROUP_TRAINING_SECTION_EVALUATORS, participant_inputs, on_entry)
+
+
+def build_group_training_section_request(
+    prompt: PromptTemplate, max_tokens: int, participant_inputs: Dict[str, str]
+) -> Dict[str, Any]:
+    return {
+        "model": EVALUATION_MODEL,
+        "max_tokens": max_tokens,
+        "system": prompt.system_blocks(),
+        "messages": [{"role": "user", "content": prompt.user_content(participant_inputs)}],
+    }
+
+
+def validate_group_training_section_payload(
+    section_key: str, criteria: List[str], payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    section = payload.get(section_key)
+    if not isinstance(section, dict):
+        raise ValueError(f"{section_key} セクションが見つからないか不正です。")
+
+    for label in criteria:
+        if label not in section:
+            raise ValueError(f"{label} の評価が欠落しています。")
+        entry = section[label]
+        score = entry.get("score") if isinstance(entry, dict) else None
+        reason = entry.get("reason") if isinstance(entry, dict) else None
+        if not isinstance(score, int) or not (1 <= score <= 5):
+            raise ValueError(f"{label} のスコアが1〜5の整数ではありません: {score}")
+        if not isinstance(reason, str) or not reason.strip():
+            raise ValueError(f"{label} の評価根拠が不正です。")
+
+    summary = payload.get("overall_summary")
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("overall_summary が欠落しているか不正です。")
+
+    return payload
+
+
+@dataclass(frozen=True)
+class EvaluatorSpec:
+    name: str
+    build_request: Callable[[Dict[str, str]], Dict[str, Any]]
+    validate_payload: Callable[[Dict[str, Any]], Dict[str, Any]]
+    max_tokens: int
+    # (JSONのセクションキー, 画面上の見出し, 観点ラベル) の並び
+    sections: Tuple[Tuple[str, str, Tuple[str, ...]], ...]
+    summary_description: str
+    # 評価に使う入力の見出し（None なら受講者の入力すべて）
+    input_labels: Optional[Tuple[str, ...]] = None
+
+    def select_inputs(self, inputs: Dict[str, str]) -> Dict[str, str]:
+        if self.input_labels is None:
+            return inputs
+        return {label: inputs.get(label, "") for label in self.input_labels}
+
+    def prepare_inputs(self, inputs: Dict[str, str]) -> Dict[str, str]:
+        """評価に使う入力を選び、正規化してトークン予算に収める（キャッシュのキーもこの結果から作る）。"""
+        return prepare_evaluation_inputs(self.select_inputs(inputs))
+
+    def parse_response(self, text_content: str) -> Dict[str, Any]:
+        return self.validate_payload(parse_json_response(text_content))
+
+    def parse_message(self, message: Any) -> Dict[str, Any]:
+        """Claudeの応答メッセージから評価を取り出して検証する。
+
+        ツール呼び出しがあればその引数を、なければテキスト中のJSONを使う。
+        """
+        for block in message.content or []:
+            if getattr(block, "type", None) == "tool_use" and block.name == EVALUATION_TOOL_NAME:
+                if not isinstance(block.input, dict):
+                    raise ValueError("評価ツールの引数がオブジェクトではありません。")
+                return self.validate_payload(block.input)
+        return self.parse_response(extract_response_text(message))
+
+    def tool_definition(self) -> Dict[str, Any]:
+        """評価基準をJSONスキーマとして宣言した評価記録ツール。"""
+        score_entry = {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer", "minimum": 1, "maximum": 5},
+                "reason": {"type": "string", "description": "点数の根拠（日本語で簡潔に）"},
+            },
+            "required": ["score", "reason"],
+        }
+        properties: Dict[str, Any] = {}
+        for section_key, title, labels in self.sections:
+            properties[section_key] = {
+                "type": "object",
+                "description": title,
+                "properties": {label: score_entry for label in labels},
+                "required": list(labels),
+            }
+        properties["overall_summary"] = {"type": "string", "description": self.summary_description}
+        return {
+            "name": EVALUATION_TOOL_NAME,
+            "description": "受講者の評価結果を観点ごとのスコアと根拠として記録する。",
+            "input_schema": {
+                "type": "object",
+                "properties": properties,
+                "required": [section_key for section_key, _, _ in self.sections] + ["overall_summary"],
+            },
+        }
+
+    def request_params(self, inputs: Dict[str, str]) -> Dict[str, Any]:
+        request = self.build_request(inputs)
+        if EVALUATION_OUTPUT_MODE == "tool":
+            request["tools"] = [self.tool_definition()]
+            request["tool_choice"] = {"type": "tool", "name": EVALUATION_TOOL_NAME}
+        return request
+
+    def static_prefix_tokens(self) -> int:
+        """プロンプトキャッシュの対象になる静的プレフィックス（ツール定義・システム文・評価基準）のトークン数の見積もり。"""
+        request = self.request_params({})
+        tokens = estimate_text_tokens(json.dumps(request.get("tools", []), ensure_ascii=False))
+        return tokens + estimate_request_tokens({**request, "max_tokens": 0})
+
+    def prompt_cacheable(self) -> bool:
+        return self.static_prefix_tokens() >= PROMPT_CACHE_MIN_TOKENS
+
+
+SUCCESSION_EVALUATOR = EvaluatorSpec(
+    name="succession",
+    build_request=build_succession_request,
+    validate_payload=validate_succession_payload,
+    max_tokens=SUCCESSION_MAX_TOKENS,
+    sections=(
+        ("competency", "コンピテンシー評価", tuple(label for label, _ in COMPETENCY_LABELS)),
+        ("readiness", "経営者準備度評価", tuple(label for label, _ in READINESS_LABELS)),
+    ),
+    summary_description="受講生の全体まとめ",
+)
+
+
+def build_group_training_section_evaluator(section_key: str, criteria: List[str]) -> EvaluatorSpec:
+    """設問1つ分の評価器。受講者の入力のうち、その設問への記述だけを評価に使う。"""
+    max_tokens = rubric_max_tokens(len(criteria))
+    title = GROUP_TRAINING_FIELD_LABELS[section_key]
+    return EvaluatorSpec(
+        name=section_key,
+        build_request=functools.partial(
+            build_group_training_section_request,
+            build_group_training_section_prompt(section_key, criteria),
+            max_tokens,
+        ),
+        validate_payload=functools.partial(validate_group_training_section_payload, section_key, criteria),
+        max_tokens=max_tokens,
+        sections=((section_key, title, tuple(criteria)),),
+        summary_description="この設問の記述全体を踏まえた講評",
+        input_labels=(title,),
+    )
+
+
+GROUP_TRAINING_SECTION_EVALUATORS = tuple(
+    build_group_training_section_evaluator(section_key, criteria)
+    for section_key, criteria in GROUP_TRAINING_RUBRICS.items()
+)
+
+
+def request_evaluation(
+    spec: EvaluatorSpec,
+    inputs: Dict[str, str],
+    *,
+    model: str = EVALUATION_MODEL,
+) -> Tuple[Dict[str, Any], EvaluationCallRecord]:
+    """評価を1回呼び出し、検証済みの評価とその呼び出しの計測値を返す。"""
     client = get_anthropic_client()
-    system_prompt = (
-        "You are an experienced facilitator for management training. "
-        "Score participants' goal-setting capability in Japanese."
+    request = {**spec.request_params(inputs), "model": model}
+    call = EvaluationCallRecord(evaluator=spec.name, model=model, mode="create")
+    started = time.monotonic()
+    try:
+        raw_response = get_request_governor().call(
+            lambda: client.messages.with_raw_response.create(**request),
+            estimated_tokens=estimate_request_tokens(request),
+            headers_of=lambda raw: raw.headers,
+            on_retry=call.count_retry,
+        )
+        return call.parse_message(spec, raw_response.parse()), call
+    except Exception as exc:
+        call.error = type(exc).__name__
+        raise
+    finally:
+        call.wall_seconds = time.monotonic() - started
+        get_evaluation_telemetry().record(call)
+
+
+def stream_evaluation(
+    spec: EvaluatorSpec,
+    inputs: Dict[str, str],
+    on_entry: ScoreEntryCallback,
+    *,
+    model: str = EVALUATION_MODEL,
+) -> Tuple[Dict[str, Any], EvaluationCallRecord]:
+    """ストリーミングAPIで評価し、観点の評価オブジェクトが閉じるたびに on_entry を呼ぶ。
+
+    テキストのJSONもツール引数の部分JSON（input_json）も同じスキャナーで読む。
+    """
+    client = get_anthropic_client()
+    request = {**spec.request_params(inputs), "model": model}
+    section_labels = {section_key: set(labels) for section_key, _, labels in spec.sections}
+    call = EvaluationCallRecord(evaluator=spec.name, model=model, mode="stream")
+    started = time.monotonic()
+    try:
+        payload = get_request_governor().call(
+            lambda: consume_evaluation_stream(spec, client, request, section_labels, on_entry, call),
+            estimated_tokens=estimate_request_tokens(request),
+            on_retry=call.count_retry,
+        )
+        return payload, call
+    except Exception as exc:
+        call.error = type(exc).__name__
+        raise
+    finally:
+        call.wall_seconds = time.monotonic() - started
+        get_evaluation_telemetry().record(call)
+
+
+def consume_evaluation_stream(
+    spec: EvaluatorSpec,
+    client: Any,
+    request: Dict[str, Any],
+    section_labels: Dict[str, Any],
+    on_entry: ScoreEntryCallback,
+    call: EvaluationCallRecord,
+) -> Dict[str, Any]:
+    scanner = IncrementalJsonScanner()
+    # 再試行された場合は、最後の試行の開始から最初のトークンまでを計る
+    attempt_started = time.monotonic()
+    call.ttft_seconds = None
+    with client.messages.stream(**request) as stream:
+        for event in stream:
+            if event.type == "text":
+                chunk = event.text
+            elif event.type == "input_json":
+                chunk = event.partial_json
+            else:
+                continue
+            if call.ttft_seconds is None:
+                call.ttft_seconds = time.monotonic() - attempt_started
+            scanner.feed(chunk)
+            for path, object_text in scanner.pop_completed_objects():
+                if len(path) != 2 or path[1] not in section_labels.get(path[0], ()):
+                    continue
+                entry = json.loads(object_text)
+                if isinstance(entry.get("score"), int) and isinstance(entry.get("reason"), str):
+                    on_entry(path[0], path[1], entry)
+        final_message = stream.get_final_message()
+
+    return call.parse_message(spec, final_message)
+
+
+def warm_up_prompt_cache(spec: EvaluatorSpec) -> None:
+    """静的プレフィックスのみのリクエストを1回送り、プロンプトキャッシュを書き込む。
+
+    一括評価の並列リクエストが同時にキャッシュミスするのを避けるために使う。
+    静的プレフィックスが PROMPT_CACHE_MIN_TOKENS に満たない評価器はキャッシュされないため、何も送らない。
+    """
+    if not spec.prompt_cacheable():
+        return
+    client = get_anthropic_client()
+    request = spec.request_params({})
+    request["max_tokens"] = 1
+    # プロンプトキャッシュはモデルごとのため、最初に呼ぶモデルのキャッシュを温める
+    request["model"] = EVALUATION_FAST_MODEL if tiered_routing_enabled() else EVALUATION_MODEL
+    get_request_governor().call(
+        lambda: client.messages.create(**request),
+        estimated_tokens=estimate_request_tokens(request),
     )
 
-    input_block = []
-    for section, value in participant_inputs.items():
-        input_block.append(f"### {section}\n{value.strip() or '未記入'}")
-    joined_inputs = "\n\n".join(input_block)
 
-    criteria_lines = "\n".join(
-        f"    \"{label}\": {{\"score\": 1-5, \"reason\": \"...\"}}" for label in GOAL_SETTING_CRITERIA
+def ensure_session_state() -> None:
+    # 受講者名簿は全セッションで共有するストアのリストをそのまま参照する
+    store = get_participant_store()
+    st.session_state.students: List[StudentRecord] = store.records("succession")
+    st.session_state.group_training_participants: List[GroupTrainingParticipant] = store.records(
+        "group_training"
+    )
+    if st.session_state.get("participant_store_revision") != store.revision:
+        st.session_state.participant_store_revision = store.revision
+        st.session_state.cohort_summary = None
+    if "cohort_summary" not in st.session_state:
+        st.session_state.cohort_summary = None
+    if "registration_form_version" not in st.session_state:
+        st.session_state.registration_form_version = 0
+    if "group_training_programs" not in st.session_state:
+        st.session_state.group_training_programs = [dict(item) for item in GROUP_TRAINING_SAMPLE_PROGRAMS]
+    if "group_training_feedback" not in st.session_state:
+        st.session_state.group_training_feedback = [dict(item) for item in GROUP_TRAINING_SAMPLE_FEEDBACK]
+    if "group_training_form_version" not in st.session_state:
+        st.session_state.group_training_form_version = 0
+    if "evaluation_jobs" not in st.session_state:
+        st.session_state.evaluation_jobs: Dict[str, "EvaluationJob"] = {}
+    if "evaluation_batches" not in st.session_state:
+        st.session_state.evaluation_batches: Dict[str, "EvaluationBatch"] = {}
+
+
+def add_student_record(name: str, inputs: Dict[str, str]) -> None:
+    get_participant_store().add("succession", name, inputs)
+    st.session_state.cohort_summary = None
+
+
+def set_student_evaluation(index: int, evaluation: EvaluationPayload) -> None:
+    get_participant_store().set_evaluation("succession", index, evaluation)
+    st.session_state.cohort_summary = None
+
+
+def add_group_training_participant(name: str, inputs: Dict[str, str]) -> None:
+    get_participant_store().add("group_training", name, inputs)
+
+
+def set_group_training_evaluation(index: int, evaluation: Dict[str, Any]) -> None:
+    get_participant_store().set_evaluation("group_training", index, evaluation)
+
+
+def reset_group_training_form() -> None:
+    st.session_state.group_training_form_version += 1
+
+
+def evaluate_with_live_score_cards(
+    sections: Tuple[Tuple[str, str, Tuple[str, ...]], ...],
+    inputs: Dict[str, str],
+    evaluate: Callable[..., Dict[str, Any]],
+) -> Dict[str, Any]:
+    """評価を実行し、ストリーミング中は届いた観点から順にスコアカードを描画する。"""
+    if not EVALUATION_STREAMING:
+        return evaluate(inputs)
+
+    placeholders = {section_key: st.empty() for section_key, _, _ in sections}
+    titles = {section_key: title for section_key, title, _ in sections}
+    # 再試行でストリームが最初からやり直されても同じ観点を重複表示しないよう、観点名で保持する
+    received: Dict[str, Dict[str, Dict[str, Any]]] = {key: {} for key in placeholders}
+
+    def on_entry(section_key: str, label: str, entry: Dict[str, Any]) -> None:
+        received[section_key][label] = entry
+        with placeholders[section_key].container():
+            render_score_cards(titles[section_key], list(received[section_key].items()))
+
+    return evaluate(inputs, on_entry=on_entry)
+
+
+def run_group_training_evaluation(index: int) -> bool:
+    try:
+        evaluation = evaluate_with_live_score_cards(
+            tuple(section for spec in GROUP_TRAINING_SECTION_EVALUATORS for section in spec.sections),
+            st.session_state.group_training_participants[index].inputs,
+            call_group_training_evaluation,
+        )
+    except (ValueError, ImportError, api_error_type()) as exc:
+        st.error(f"評価の呼び出し中にエラーが発生しました: {exc}")
+        return False
+    set_group_training_evaluation(index, evaluation)
+    return True
+
+
+EVALUATION_JOB_APPLIERS: Dict[str, Callable[[int, Dict[str, Any]], None]] = {
+    "succession": set_student_evaluation,
+    "group_training": set_group_training_evaluation,
+}
+
+# 種別ごとの評価器。複数ある場合は設問ごとに評価して merge_section_evaluations でまとめる
+EVALUATION_JOB_EVALUATORS: Dict[str, Tuple[EvaluatorSpec, ...]] = {
+    "succession": (SUCCESSION_EVALUATOR,),
+    "group_training": GROUP_TRAINING_SECTION_EVALUATORS,
+}
+
+EVALUATION_JOB_CALLERS: Dict[str, Callable[[Dict[str, str]], Dict[str, Any]]] = {
+    "succession": call_claude,
+    "group_training": call_group_training_evaluation,
+}
+
+
+@st.cache_resource(show_spinner=False)
+def get_evaluation_executor() -> ThreadPoolExecutor:
+    """サーバープロセス全体で共有する評価用スレッドプール。
+
+    スクリプトの再実行やページ切り替えとは独立して動作するため、
+    実行中の評価は画面操作で中断されない。
+    """
+    return ThreadPoolExecutor(
+        max_workers=BULK_EVALUATION_MAX_WORKERS,
+        thread_name_prefix="evaluation-job",
+    )
+
+
+@dataclass
+class EvaluationJob:
+    job_id: str
+    kind: str
+    targets: List[Tuple[int, str]]
+    deadline: float
+    # 評価結果はワーカーがこのストアへ直接書き込む（タブを閉じても完了した評価は失われない）
+    store: ParticipantStore
+    created_at: float = field(default_factory=time.time)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    # 進捗表示用の完了通知（受講者の番号, 氏名, 失敗時のエラー。成功なら None）
+    inbox: "queue.Queue[Tuple[int, str, Optional[str]]]" = field(default_factory=queue.Queue)
+    warm_up_done: threading.Event = field(default_factory=threading.Event)
+    futures: List[Future] = field(default_factory=list)
+    completed_names: List[str] = field(default_factory=list)
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+    notified: bool = False
+
+    @property
+    def total(self) -> int:
+        return len(self.targets)
+
+    @property
+    def done_count(self) -> int:
+        return len(self.completed_names) + len(self.failures)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.done_count >= self.total
+
+    @property
+    def status_label(self) -> str:
+        if self.is_finished:
+            return "キャンセル済み" if self.cancel_event.is_set() else "完了"
+        if self.cancel_event.is_set():
+            return "キャンセル中"
+        if time.time() > self.deadline:
+            return "期限切れ（実行中の評価のみ継続）"
+        return "実行中"
+
+
+def run_evaluation_job_task(
+    job: EvaluationJob,
+    index: int,
+    name: str,
+    inputs: Dict[str, str],
+    evaluator: Callable[[Dict[str, str]], Dict[str, Any]],
+) -> None:
+    """ワーカースレッドで1名分を評価し、結果を共有の ParticipantStore に反映して受信箱へ完了を通知する。
+
+    session_state には触れない。受信箱はスクリプト側の drain_evaluation_jobs が進捗表示に使う。
+    """
+    job.warm_up_done.wait(timeout=PROMPT_CACHE_WARMUP_TIMEOUT_SECONDS)
+    if job.cancel_event.is_set():
+        job.inbox.put((index, name, "キャンセルされました"))
+        return
+    if time.time() > job.deadline:
+        job.inbox.put((index, name, "ジョブの期限を過ぎたため評価しませんでした"))
+        return
+    try:
+        evaluation = evaluator(inputs)
+        # ストアのロックの下で反映するため、ほかのセッションやワーカーの書き込みと競合しない
+        job.store.set_evaluation(job.kind, index, evaluation)
+    except Exception as exc:  # ワーカー内の例外はすべて受講者単位の失敗として扱う
+        job.inbox.put((index, name, str(exc)))
+    else:
+        job.inbox.put((index, name, None))
+
+
+def run_prompt_cache_warm_up(job: EvaluationJob, specs: Tuple[EvaluatorSpec, ...]) -> None:
+    try:
+        # 設問ごとにプロンプトが異なるため、すべての評価器のキャッシュを並列に温める
+        list(get_section_executor().map(warm_up_prompt_cache, specs))
+    except Exception:  # ウォームアップの失敗は評価そのものには影響させない
+        logger.warning("プロンプトキャッシュのウォームアップに失敗しました。", exc_info=True)
+    finally:
+        job.warm_up_done.set()
+
+
+def submit_evaluation_job(
+    kind: str,
+    records: List[Any],
+    indices: List[int],
+    evaluator: Callable[[Dict[str, str]], Dict[str, Any]],
+    *,
+    deadline_seconds: float = EVALUATION_JOB_DEADLINE_SECONDS,
+) -> EvaluationJob:
+    job = EvaluationJob(
+        job_id=uuid.uuid4().hex[:8],
+        kind=kind,
+        targets=[(idx, records[idx].name) for idx in indices],
+        deadline=time.time() + deadline_seconds,
+        store=get_participant_store(),
+    )
+    executor = get_evaluation_executor()
+    specs = tuple(spec for spec in EVALUATION_JOB_EVALUATORS[kind] if spec.prompt_cacheable())
+    if PROMPT_CACHE_WARMUP and len(indices) > 1 and specs:
+        executor.submit(run_prompt_cache_warm_up, job, specs)
+    else:
+        job.warm_up_done.set()
+    for idx in indices:
+        record = records[idx]
+        job.futures.append(
+            executor.submit(
+                run_evaluation_job_task, job, idx, record.name, dict(record.inputs), evaluator
+            )
+        )
+    st.session_state.evaluation_jobs[job.job_id] = job
+    return job
+
+
+def cancel_evaluation_job(job: EvaluationJob) -> None:
+    job.cancel_event.set()
+    # 未着手のタスクはワーカーに届かないため、ここで受信箱にキャンセルを記録する
+    for future, (index, name) in zip(job.futures, job.targets):
+        if future.cancel():
+            job.inbox.put((index, name, "キャンセルされました"))
+
+
+def drain_evaluation_jobs() -> None:
+    """全ジョブの受信箱から完了通知を取り出し、進捗表示に反映する。
+
+    評価結果そのものはワーカーがストアへ反映済みのため、ここでは session_state の表示状態だけを更新する。
+    """
+    for job in st.session_state.evaluation_jobs.values():
+        while True:
+            try:
+                _, name, error = job.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                job.completed_names.append(name)
+                if job.kind == "succession":
+                    st.session_state.cohort_summary = None
+            else:
+                job.failures.append((name, error))
+
+
+def active_job_indices(kind: str) -> set:
+    indices = set()
+    for job in st.session_state.evaluation_jobs.values():
+        if job.kind == kind and not job.is_finished:
+            indices.update(idx for idx, _ in job.targets)
+    return indices
+
+
+def render_evaluation_job_progress(kind: str) -> None:
+    drain_evaluation_jobs()
+    jobs = [job for job in st.session_state.evaluation_jobs.values() if job.kind == kind]
+    needs_full_rerun = False
+
+    for job in jobs:
+        with st.container(border=True):
+            st.markdown(f"**一括評価ジョブ {job.job_id}** ― {job.status_label}")
+            st.progress(
+                job.done_count / job.total if job.total else 1.0,
+                text=f"{job.done_count} / {job.total} 名の評価が完了（失敗 {len(job.failures)}名）",
+            )
+            if job.failures:
+                with st.expander(f"失敗した受講者 {len(job.failures)}名"):
+                    for name, message in job.failures:
+                        st.markdown(f"- {name}: {message}")
+            if job.is_finished:
+                if not job.notified:
+                    job.notified = True
+                    needs_full_rerun = True
+                if st.button("この表示を閉じる", key=f"dismiss_job_{job.job_id}"):
+                    del st.session_state.evaluation_jobs[job.job_id]
+                    needs_full_rerun = True
+            elif not job.cancel_event.is_set():
+                if st.button("キャンセル", key=f"cancel_job_{job.job_id}"):
+                    cancel_evaluation_job(job)
+
+    if needs_full_rerun:
+        # 評価結果を一覧やメトリクスにも反映するため、ページ全体を再描画する
+        st.rerun()
+
+
+def render_evaluation_jobs_panel(kind: str) -> None:
+    jobs = [job for job in st.session_state.evaluation_jobs.values() if job.kind == kind]
+    if not jobs:
+        return
+    polling = any(not job.is_finished for job in jobs)
+    st.fragment(run_every=EVALUATION_JOB_POLL_SECONDS if polling else None)(
+        render_evaluation_job_progress
+    )(kind)
+
+
+@dataclass
+class EvaluationBatch:
+    """Message Batches API に送信した一括評価。
+
+    custom_id は受講者のインデックスと評価器の番号（設問ごとに評価する種別では1名につき複数件）。
+    """
+
+    batch_id: str
+    kind: str
+    targets: Dict[str, Tuple[int, str]]
+    cache_keys: Dict[str, str]
+    # custom_id → 評価器の名前
+    evaluators: Dict[str, str] = field(default_factory=dict)
+    # 送信前に評価キャッシュから取り出せた設問の評価（受講者のインデックス → 評価器の名前 → 評価）
+    cached_parts: Dict[int, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.time)
+    processing_status: str = "in_progress"
+    request_counts: Dict[str, int] = field(default_factory=dict)
+    completed_names: List[str] = field(default_factory=list)
+    failures: List[Tuple[str, str]] = field(default_factory=list)
+    imported: bool = False
+
+    @property
+    def participant_count(self) -> int:
+        return len({index for index, _ in self.targets.values()})
+
+
+def combine_evaluation_parts(
+    specs: Tuple[EvaluatorSpec, ...],
+    payloads: Dict[str, Dict[str, Any]],
+    errors: Dict[str, str],
+) -> Dict[str, Any]:
+    """評価器ごとの結果を1名分の評価にする。評価器が1つなら、その結果をそのまま使う。"""
+    if len(specs) > 1:
+        return merge_section_evaluations(specs, payloads, errors)
+    if specs[0].name not in payloads:
+        raise ValueError(next(iter(errors.values()), "バッチの結果が見つかりませんでした"))
+    return payloads[specs[0].name]
+
+
+def submit_evaluation_batch(kind: str, records: List[Any], indices: List[int]) -> Optional[EvaluationBatch]:
+    """未評価の受講者をまとめて1つのバッチとして送信する。
+
+    評価キャッシュにある評価はその場で使い、残りだけを送信する（全設問がキャッシュにあれば即時に反映する）。
+    送信対象がなければ None を返す。
+    """
+    specs = EVALUATION_JOB_EVALUATORS[kind]
+    apply_evaluation = EVALUATION_JOB_APPLIERS[kind]
+    cache = get_evaluation_cache()
+
+    requests: List[Dict[str, Any]] = []
+    targets: Dict[str, Tuple[int, str]] = {}
+    cache_keys: Dict[str, str] = {}
+    evaluators: Dict[str, str] = {}
+    cached_parts: Dict[int, Dict[str, Dict[str, Any]]] = {}
+    for idx in indices:
+        record = records[idx]
+        parts: Dict[str, Dict[str, Any]] = {}
+        uncached: List[Tuple[int, EvaluatorSpec, str, Dict[str, str]]] = []
+        for spec_number, spec in enumerate(specs):
+            inputs = spec.prepare_inputs(record.inputs)
+            cache_key = make_evaluation_cache_key(
+                spec.name, inputs, model=EVALUATION_MODEL, max_tokens=spec.max_tokens
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                parts[spec.name] = cached
+            else:
+                uncached.append((spec_number, spec, cache_key, inputs))
+        if not uncached:
+            apply_evaluation(idx, combine_evaluation_parts(specs, parts, {}))
+            continue
+        if parts:
+            cached_parts[idx] = parts
+        for spec_number, spec, cache_key, inputs in uncached:
+            custom_id = f"{kind}-{idx}" if len(specs) == 1 else f"{kind}-{idx}-{spec_number}"
+            targets[custom_id] = (idx, record.name)
+            cache_keys[custom_id] = cache_key
+            evaluators[custom_id] = spec.name
+            requests.append({"custom_id": custom_id, "params": spec.request_params(inputs)})
+
+    if not requests:
+        return None
+
+    client = get_anthropic_client()
+    message_batch = get_request_governor().call(lambda: client.messages.batches.create(requests=requests))
+    batch = EvaluationBatch(
+        batch_id=message_batch.id,
+        kind=kind,
+        targets=targets,
+        cache_keys=cache_keys,
+        evaluators=evaluators,
+        cached_parts=cached_parts,
+        processing_status=message_batch.processing_status,
     )
+    st.session_state.evaluation_batches[batch.batch_id] = batch
+    return batch
 
-    user_prompt = f"""
-あなたは管理職研修の評価者です。以下の受講者入力を分析し、目標設定能力に関する8観点を5点満点の整数で評価してください。各観点について、観点ごとの行動や記述の有無を踏まえた評価根拠を簡潔に記載してください。必ず下記のJSONフォーマットのみを出力し、余分な文章は含めないでください。
 
-期待するJSON構造:
-{{
-  "goal_setting": {{
-{criteria_lines}
-  }},
-  "overall_summary": "観点全体を踏まえた講評"
-}}
+def refresh_evaluation_batch(batch: EvaluationBatch) -> None:
+    """バッチの処理状況を取得し、終了していれば結果を取り込む。"""
+    if batch.imported:
+        return
+    client = get_anthropic_client()
+    message_batch = get_request_governor().call(lambda: client.messages.batches.retrieve(batch.batch_id))
+    batch.processing_status = message_batch.processing_status
+    counts = message_batch.request_counts
+    batch.request_counts = {
+        "processing": counts.processing,
+        "succeeded": counts.succeeded,
+        "errored": counts.errored,
+        "canceled": counts.canceled,
+        "expired": counts.expired,
+    }
+    if batch.processing_status == "ended":
+        import_evaluation_batch_results(batch)
 
-受講者の入力:
-{joined_inputs}
-"""
 
-    response = client.messages.create(
-        model="claude-opus-4-20250514",
-        max_tokens=1000,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_prompt}],
-    )
+def import_evaluation_batch_results(batch: EvaluationBatch) -> None:
+    """終了したバッチの結果を検証し、評価キャッシュと受講者レコードへ反映する。
 
-    if not response.content:
-        raise ValueError("Claudeの応答が空でした。")
+    設問ごとに評価する種別は受講者単位でまとめ、失敗した設問があってもほかの設問の結果は反映する。
+    """
+    specs = EVALUATION_JOB_EVALUATORS[batch.kind]
+    specs_by_name = {spec.name: spec for spec in specs}
+    apply_evaluation = EVALUATION_JOB_APPLIERS[batch.kind]
+    cache = get_evaluation_cache()
+    client = get_anthropic_client()
+    telemetry = get_evaluation_telemetry()
 
-    text_content = "".join(part.text for part in response.content if hasattr(part, "text"))
-    if not text_content:
-        raise ValueError("Claudeの応答にテキストが含まれていません。")
+    payloads: Dict[int, Dict[str, Dict[str, Any]]] = {
+        index: dict(parts) for index, parts in batch.cached_parts.items()
+    }
+    errors: Dict[int, Dict[str, str]] = {}
+    names = {index: name for index, name in batch.targets.values()}
+    results = get_request_governor().call(lambda: list(client.messages.batches.results(batch.batch_id)))
+    for entry in results:
+        if entry.custom_id not in batch.targets:
+            continue
+        index, _ = batch.targets[entry.custom_id]
+        # custom_id に評価器の記録がない（単一の評価器で送信した）場合は先頭の評価器を使う
+        spec = specs_by_name.get(batch.evaluators.get(entry.custom_id, ""), specs[0])
+        result = entry.result
+        if result.type != "succeeded":
+            errors.setdefault(index, {})[spec.name] = f"バッチ処理結果: {result.type}"
+            continue
+        # バッチは非同期に処理されるため所要時間は記録せず、トークン数や解析結果だけを集計する
+        call = EvaluationCallRecord(
+            evaluator=spec.name, model=getattr(result.message, "model", None) or EVALUATION_MODEL, mode="batch"
+        )
+        try:
+            evaluation = call.parse_message(spec, result.message)
+        except ValueError as exc:
+            call.error = type(exc).__name__
+            errors.setdefault(index, {})[spec.name] = str(exc)
+            continue
+        finally:
+            telemetry.record(call)
+        cache.put(batch.cache_keys[entry.custom_id], spec.name, evaluation)
+        payloads.setdefault(index, {})[spec.name] = evaluation
+
+    for index, name in names.items():
+        try:
+            evaluation = combine_evaluation_parts(specs, payloads.get(index, {}), errors.get(index, {}))
+        except ValueError as exc:
+            batch.failures.append((name, str(exc)))
+            continue
+        apply_evaluation(index, evaluation)
+        batch.completed_names.append(name)
+    batch.imported = True
+
+
+def active_batch_indices(kind: str) -> set:
+    indices = set()
+    for batch in st.session_state.evaluation_batches.values():
+        if batch.kind == kind and not batch.imported:
+            indices.update(idx for idx, _ in batch.targets.values())
+    return indices
+
+
+def render_evaluation_batch_status(kind: str) -> None:
+    batches = [batch for batch in st.session_state.evaluation_batches.values() if batch.kind == kind]
+    needs_full_rerun = False
+
+    for batch in batches:
+        if not batch.imported:
+            try:
+                refresh_evaluation_batch(batch)
+            except (ValueError, ImportError, api_error_type()) as exc:
+                st.error(f"バッチ {batch.batch_id} の状況確認に失敗しました: {exc}")
+                continue
+            needs_full_rerun = needs_full_rerun or batch.imported
+
+        submitted = time.strftime("%m/%d %H:%M", time.localtime(batch.submitted_at))
+        with st.container(border=True):
+            st.markdown(f"**バッチ {batch.batch_id}**（{submitted} 送信・{batch.participant_count}名）")
+            if batch.imported:
+                st.markdown(
+                    f"取り込み完了: 成功 {len(batch.completed_names)}名 / 失敗 {len(batch.failures)}名"
+                )
+                for name, message in batch.failures:
+                    st.markdown(f"- {name}: {message}")
+                if st.button("この表示を閉じる", key=f"dismiss_batch_{batch.batch_id}"):
+                    del st.session_state.evaluation_batches[batch.batch_id]
+                    needs_full_rerun = True
+            else:
+                counts = batch.request_counts
+                st.markdown(
+                    f"処理状況: {batch.processing_status}（処理中 {counts.get('processing', len(batch.targets))}件 / "
+                    f"成功 {counts.get('succeeded', 0)}件 / エラー {counts.get('errored', 0)}件）"
+                )
+                st.button("状況を今すぐ確認", key=f"refresh_batch_{batch.batch_id}")
 
-    try:
-        payload = json.loads(text_content)
-    except json.JSONDecodeError:
-        json_candidate = extract_json_from_text(text_content)
-        if json_candidate is None:
-            preview = text_content[:200].replace("\n", " ")
-            raise ValueError(
-                f"Claudeの応答をJSONとして解釈できませんでした。応答内容: {preview}"
-            )
-        payload = json.loads(json_candidate)
+    if needs_full_rerun:
+        st.rerun()
 
-    goal_section = payload.get("goal_setting")
-    if not isinstance(goal_section, dict):
-        raise ValueError("goal_setting セクションが見つからないか不正です。")
 
-    for label in GOAL_SETTING_CRITERIA:
-        if label not in goal_section:
-            raise ValueError(f"{label} の評価が欠落しています。")
-        entry = goal_section[label]
-        score = entry.get("score") if isinstance(entry, dict) else None
-        reason = entry.get("reason") if isinstance(entry, dict) else None
-        if not isinstance(score, int) or not (1 <= score <= 5):
-            raise ValueError(f"{label} のスコアが1〜5の整数ではありません: {score}")
-        if not isinstance(reason, str) or not reason.strip():
-            raise ValueError(f"{label} の評価根拠が不正です。")
+def render_evaluation_batch_panel(kind: str, records: List[Any], pending_indices: List[int]) -> None:
+    with st.expander("大人数向け: バッチ評価（Message Batches API）"):
+        st.caption(
+            "未評価の受講者をまとめて1つの非同期バッチとして送信します。"
+            "結果は最大24時間以内に返り、このページを開いている間は自動で状況を確認して取り込みます。"
+        )
+        if pending_indices and st.button("未評価の受講者をバッチ送信", key=f"submit_batch_{kind}"):
+            try:
+                batch = submit_evaluation_batch(kind, records, pending_indices)
+            except (ValueError, ImportError, api_error_type()) as exc:
+                st.error(f"バッチの送信中にエラーが発生しました: {exc}")
+            else:
+                if batch is None:
+                    st.success("全員の評価がキャッシュから反映されました。")
+                else:
+                    st.success(f"{batch.participant_count}名をバッチ {batch.batch_id} として送信しました。")
 
-    summary = payload.get("overall_summary")
-    if not isinstance(summary, str) or not summary.strip():
-        raise ValueError("overall_summary が欠落しているか不正です。")
+        batches = [batch for batch in st.session_state.evaluation_batches.values() if batch.kind == kind]
+        if batches:
+            polling = any(not batch.imported for batch in batches)
+            st.fragment(run_every=EVALUATION_BATCH_POLL_SECONDS if polling else None)(
+                render_evaluation_batch_status
+            )(kind)
 
-    return payload
 
+def participant_status(record: Any, index: int, queued_indices: set) -> str:
+    if record.evaluation is not None:
+        # 設問ごとに評価する種別で、一部の設問の評価に失敗したもの
+        return "一部失敗" if record.evaluation.get("section_errors") else "評価済み"
+    if index in queued_indices:
+        return "評価中"
+    return "未評価"
 
-def ensure_session_state() -> None:
-    if "students" not in st.session_state:
-        st.session_state.students: List[StudentRecord] = []
-    if "cohort_summary" not in st.session_state:
-        st.session_state.cohort_summary = None
-    if "registration_form_version" not in st.session_state:
-        st.session_state.registration_form_version = 0
-    if "group_training_programs" not in st.session_state:
-        st.session_state.group_training_programs = [dict(item) for item in GROUP_TRAINING_SAMPLE_PROGRAMS]
-    if "group_training_feedback" not in st.session_state:
-        st.session_state.group_training_feedback = [dict(item) for item in GROUP_TRAINING_SAMPLE_FEEDBACK]
-    if "group_training_participants" not in st.session_state:
-        st.session_state.group_training_participants: List[GroupTrainingParticipant] = []
-    if "group_training_form_version" not in st.session_state:
-        st.session_state.group_training_form_version = 0
 
+def filter_participant_indices(
+    records: List[Any],
+    queued_indices: set,
+    *,
+    status: str,
+    name_query: str,
+    score_band: str,
+) -> List[int]:
+    """絞り込み条件に合う受講者の位置を名簿順に返す。"""
+    name_query = name_query.strip().lower()
+    band = PARTICIPANT_SCORE_BANDS[score_band]
+    indices: List[int] = []
+    for index, record in enumerate(records):
+        if status != "すべて" and participant_status(record, index, queued_indices) != status:
+            continue
+        if name_query and name_query not in record.name.lower():
+            continue
+        if band is not None:
+            if record.summary is None or not band[0] <= record.summary.overall_score < band[1]:
+                continue
+        indices.append(index)
+    return indices
+
+
+def render_participant_list(
+    kind: str,
+    records: List[Any],
+    queued_indices: set,
+    render_panel: Callable[[int, Any], None],
+) -> None:
+    """受講者一覧を絞り込み・ページ送り付きで表示し、表示中のページの受講者だけを描画する。
+
+    render_panel は st.fragment として定義し、受講者ごとの操作がその受講者の枠だけを再実行するようにする。
+    """
+    filter_columns = st.columns([1, 2, 1])
+    with filter_columns[0]:
+        status = st.selectbox("ステータス", PARTICIPANT_STATUS_FILTERS, key=f"{kind}_filter_status")
+    with filter_columns[1]:
+        name_query = st.text_input("氏名で絞り込み", key=f"{kind}_filter_name")
+    with filter_columns[2]:
+        score_band = st.selectbox(
+            "総合スコア", list(PARTICIPANT_SCORE_BANDS), key=f"{kind}_filter_score_band"
+        )
 
-def add_student_record(name: str, inputs: Dict[str, str]) -> None:
-    record = StudentRecord(name=name, inputs=inputs)
-    st.session_state.students.append(record)
-    st.session_state.cohort_summary = None
+    indices = filter_participant_indices(
+        records, queued_indices, status=status, name_query=name_query, score_band=score_band
+    )
+    if not indices:
+        st.info("条件に合う受講者がいません。")
+        return
 
+    page_count = (len(indices) + PARTICIPANT_PAGE_SIZE - 1) // PARTICIPANT_PAGE_SIZE
+    page_key = f"{kind}_list_page"
+    # 絞り込みで総ページ数が減った場合は最終ページに寄せる
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    page = 1
+    if page_count > 1:
+        page = st.number_input("ページ", min_value=1, max_value=page_count, step=1, key=page_key)
+    start = (page - 1) * PARTICIPANT_PAGE_SIZE
+    end = min(start + PARTICIPANT_PAGE_SIZE, len(indices))
+    st.caption(f"{len(indices)}名中 {start + 1}〜{end}名を表示（全{page_count}ページ）")
+
+    for index in indices[start:end]:
+        render_panel(index, records[index])
+
+
+def iter_export_records(kind: str) -> Iterator[Dict[str, Any]]:
+    """受講者ごとの入力・評価・集計値を1件ずつ返す（エクスポート用）。"""
+    for record in list(get_participant_store().records(kind)):
+        summary = record.summary
+        yield {
+            "record_id": record.record_id,
+            "name": record.name,
+            "inputs": record.inputs,
+            "evaluation": record.evaluation,
+            "summary": None
+            if summary is None
+            else {
+                "section_averages": summary.section_averages,
+                "overall_score": summary.overall_score,
+                "top": summary.top[0],
+                "growth": summary.growth[0],
+                "rank": summary.rank,
+                "cohort_size": summary.cohort_size,
+            },
+        }
 
-def set_student_evaluation(index: int, evaluation: EvaluationPayload) -> None:
-    st.session_state.students[index].evaluation = evaluation
-    st.session_state.cohort_summary = None
 
+def write_jsonl_export(kind: str, path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as output:
+        for row in iter_export_records(kind):
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def write_csv_export(kind: str, path: str) -> int:
+    store = get_participant_store()
+    columns = store.score_columns[kind]
+    input_labels = participant_input_labels(kind)
+    header = ["record_id", "name", *input_labels]
+    for _, label in columns:
+        header.extend([f"{label} スコア", f"{label} 根拠"])
+    header.extend(["総評", "総合スコア", "順位"])
+
+    count = 0
+    # Excelで文字化けしないようBOM付きUTF-8で書き出す
+    with open(path, "w", encoding="utf-8-sig", newline="") as output:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for row in iter_export_records(kind):
+            evaluation = row["evaluation"] or {}
+            cells: List[Any] = [row["record_id"], row["name"]]
+            cells.extend(row["inputs"].get(label, "") for label in input_labels)
+            for section, label in columns:
+                entry = evaluation.get(section, {}).get(label, {})
+                cells.extend([entry.get("score", ""), entry.get("reason", "")])
+            summary = row["summary"] or {}
+            cells.extend(
+                [
+                    evaluation.get("overall_summary", ""),
+                    f"{summary['overall_score']:.2f}" if summary else "",
+                    summary.get("rank", ""),
+                ]
+            )
+            writer.writerow(cells)
+            count += 1
+    return count
+
+
+def write_columnar_export(kind: str, path: str, file_format: str) -> int:
+    """スコア行列をParquet/Arrowファイルへ EXPORT_CHUNK_ROWS 行ずつ書き出す。未評価の受講者のスコアはnull。"""
+    import pyarrow as pa
+
+    store = get_participant_store()
+    records = list(store.records(kind))
+    matrix = store.score_matrix(kind)
+    columns = store.score_columns[kind]
+    schema = pa.schema(
+        [("record_id", pa.int64()), ("name", pa.string())]
+        + [(label, pa.int8()) for _, label in columns]
+        + [("overall_score", pa.float64()), ("rank", pa.int32())]
+    )
 
-def add_group_training_participant(name: str, inputs: Dict[str, str]) -> None:
-    participant = GroupTrainingParticipant(name=name, inputs=inputs)
-    st.session_state.group_training_participants.append(participant)
+    if file_format == ".parquet":
+        import pyarrow.parquet as pq
 
+        writer = pq.ParquetWriter(path, schema)
+        write_batch = writer.write_batch
+    else:
+        sink = pa.OSFile(path, "wb")
+        writer = pa.ipc.new_file(sink, schema)
+        write_batch = writer.write_batch
 
-def set_group_training_evaluation(index: int, evaluation: Dict[str, Any]) -> None:
-    st.session_state.group_training_participants[index].evaluation = evaluation
+    try:
+        for start in range(0, len(records), EXPORT_CHUNK_ROWS):
+            chunk = records[start : start + EXPORT_CHUNK_ROWS]
+            scores = matrix.scores_slice(start, start + len(chunk))
+            missing = np.isnan(scores)
+            arrays = [
+                pa.array([record.record_id for record in chunk], pa.int64()),
+                pa.array([record.name for record in chunk], pa.string()),
+            ]
+            for column in range(len(columns)):
+                arrays.append(
+                    pa.array(
+                        np.nan_to_num(scores[:, column]).astype(np.int8),
+                        mask=missing[:, column],
+                        type=pa.int8(),
+                    )
+                )
+            arrays.append(
+                pa.array(
+                    [record.summary.overall_score if record.summary else None for record in chunk],
+                    pa.float64(),
+                )
+            )
+            arrays.append(
+                pa.array([record.summary.rank if record.summary else None for record in chunk], pa.int32())
+            )
+            write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
+        if file_format != ".parquet":
+            sink.close()
+    return len(records)
+
+
+def export_evaluations(kind: str, format_label: str) -> Tuple[str, int]:
+    """評価結果をエクスポートファイルに書き出し、(パス, 件数) を返す。"""
+    os.makedirs(EXPORT_DIRECTORY, exist_ok=True)
+    suffix = EXPORT_FORMATS[format_label]
+    path = os.path.join(EXPORT_DIRECTORY, f"{kind}_{time.strftime('%Y%m%d_%H%M%S')}{suffix}")
+    if suffix == ".jsonl":
+        count = write_jsonl_export(kind, path)
+    elif suffix == ".csv":
+        count = write_csv_export(kind, path)
+    else:
+        count = write_columnar_export(kind, path, suffix)
+    return path, count
 
 
-def reset_group_training_form() -> None:
-    st.session_state.group_training_form_version += 1
+def render_evaluation_export(kind: str) -> None:
+    with st.expander("評価結果のエクスポート"):
+        st.caption(
+            "JSONL/CSVは入力内容・観点別スコア・評価根拠・総評を、Parquet/Arrowは観点別スコアと総合スコアを出力します。"
+        )
+        format_label = st.selectbox("形式", list(EXPORT_FORMATS), key=f"{kind}_export_format")
+        export_key = f"{kind}_export_file"
+        if st.button("エクスポートファイルを作成", key=f"{kind}_export_create"):
+            try:
+                st.session_state[export_key] = export_evaluations(kind, format_label)
+            except (ImportError, OSError) as exc:
+                st.error(f"エクスポートに失敗しました: {exc}")
+        exported = st.session_state.get(export_key)
+        if exported and os.path.exists(exported[0]):
+            path, count = exported
+            st.caption(f"{count}名分を書き出しました: {path}")
+            with open(path, "rb") as exported_file:
+                st.download_button(
+                    "ダウンロード",
+                    exported_file,
+                    file_name=os.path.basename(path),
+                    key=f"{kind}_export_download",
+                )
 
 
-def run_goal_setting_evaluation(index: int) -> bool:
-    try:
-        evaluation = call_goal_setting_evaluation(
-            st.session_state.group_training_participants[index].inputs
-        )
-    except (ValueError, ImportError, APIError) as exc:
-        st.error(f"評価の呼び出し中にエラーが発生しました: {exc}")
-        return False
-    set_group_training_evaluation(index, evaluation)
-    return True
+def describe_routing(evaluation: Dict[str, Any]) -> Optional[str]:
+    """段階的なモデル選択の記録を1行の説明にする。記録がなければ None。"""
+    routing = evaluation.get("routing")
+    if not routing:
+        return None
+    escalated = [
+        f"{GROUP_TRAINING_FIELD_LABELS.get(name, '評価')}（{decision['reason']}）"
+        for name, decision in routing.items()
+        if decision["escalated"]
+    ]
+    saved = [decision["saved_seconds"] for decision in routing.values() if decision["saved_seconds"] is not None]
+    parts = [f"高速モデルで確定 {len(routing) - len(escalated)}件"]
+    if escalated:
+        parts.append(f"{EVALUATION_MODEL} で再評価: " + "、".join(escalated))
+    if saved:
+        parts.append(f"短縮見込み {sum(saved):+.1f}秒")
+    return "評価モデル: " + " / ".join(parts)
 
 
-def render_goal_setting_result(
-    participant: GroupTrainingParticipant,
-    *,
-    key_prefix: str,
-) -> None:
+def render_group_training_result(participant: GroupTrainingParticipant) -> None:
     if participant.evaluation is None:
         st.warning("まだ評価が実行されていません。")
         return
 
-    goal_section = participant.evaluation.get("goal_setting", {})
-    entries = []
-    scores: List[int] = []
-    for label in GOAL_SETTING_CRITERIA:
-        entry = goal_section.get(label, {"score": 0, "reason": ""})
-        entries.append((label, entry))
-        scores.append(entry.get("score", 0))
-
-    avg_score = sum(scores) / len(scores) if scores else 0.0
-    top_label, top_entry = max(entries, key=lambda item: item[1].get("score", 0))
-    growth_label, growth_entry = min(entries, key=lambda item: item[1].get("score", 0))
+    summary = participant.summary
+    evaluation = participant.evaluation
+    section_errors = evaluation.get("section_errors", {})
+    top_label, top_score = summary.top
+    growth_label, growth_score = summary.growth
 
     render_metric_row(
         [
-            {"title": "平均スコア", "value": f"{avg_score:.1f}点", "caption": "8観点の平均"},
+            {
+                "title": "平均スコア",
+                "value": f"{summary.overall_score:.1f}点",
+                "caption": f"{len(summary.section_averages)}設問の平均（全体 {summary.rank}位 / {summary.cohort_size}名）",
+            },
             {
                 "title": "強み",
-                "value": f"{top_label} {top_entry.get('score', 0)}点",
+                "value": f"{top_label} {top_score}点",
                 "caption": "最もスコアが高い観点",
             },
             {
                 "title": "伸びしろ",
-                "value": f"{growth_label} {growth_entry.get('score', 0)}点",
+                "value": f"{growth_label} {growth_score}点",
                 "caption": "優先的に強化したい観点",
             },
         ]
     )
 
-    render_score_cards("評価詳細", entries)
-
-    summary_text = participant.evaluation.get("overall_summary", "（未提供）")
-    st.markdown(f"**総評:** {summary_text}")
+    for section_key, criteria in GROUP_TRAINING_RUBRICS.items():
+        title = GROUP_TRAINING_FIELD_LABELS[section_key]
+        if section_key in evaluation:
+            render_score_cards(title, [(label, evaluation[section_key][label]) for label in criteria])
+        elif section_key in section_errors:
+            st.warning(f"{title}: 評価に失敗しました（{section_errors[section_key]}）")
 
-    # normalized_prefix = key_prefix.replace(" ", "_")
-    # render_radar_chart(
-    #     f"{participant.name} - 目標設定能力",
-    #     GOAL_SETTING_CRITERIA,
-    #     {participant.name: scores},
-    #     chart_key=f"{normalized_prefix}_goal_setting_radar",
-    # )
+    summary_text = evaluation.get("overall_summary", "（未提供）")
+    # 設問ごとの講評を1行ずつ表示する
+    st.markdown("**総評:**  \n" + summary_text.replace("\n", "  \n"))
+    routing_text = describe_routing(evaluation)
+    if routing_text:
+        st.caption(routing_text)
 
 
 def render_radar_chart(
@@ -550,6 +3140,8 @@ def render_radar_chart(
     *,
     chart_key: Optional[str] = None,
 ):
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     angles = labels + [labels[0]]
     for series_name, scores in data_series.items():
@@ -565,18 +3157,161 @@ def render_divider() -> None:
     st.markdown("<div class='custom-divider'></div>", unsafe_allow_html=True)
 
 
-def render_score_cards(section_title: str, entries: List[Any]) -> None:
-    if not entries:
-        return
+METRIC_CARD_ACCENTS = [
+    "linear-gradient(135deg, #dce9ff 0%, #f1f6ff 100%)",
+    "linear-gradient(135deg, #f7d9ff 0%, #fdefff 100%)",
+    "linear-gradient(135deg, #dff8ff 0%, #f1fcff 100%)",
+    "linear-gradient(135deg, #ffe5d4 0%, #fff3ea 100%)",
+]
 
-    st.markdown(f"### {section_title}")
-    columns = 2 if len(entries) > 2 else len(entries)
-    cols = st.columns(columns or 1)
 
-    def score_card_html(label: str, score: int, reason: str) -> str:
-        safe_label = html.escape(label)
-        safe_reason = html.escape(reason)
-        return f"""
+@dataclass
+class RerunProfile:
+    """スクリプト再実行1回分の描画時間。timings は関数名 → [合計秒, 自己時間秒, 呼び出し回数]。"""
+
+    started_at: float
+    timings: Dict[str, List[float]] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    page: str = ""
+    # 呼び出し中の関数ごとに、子関数に使った秒数を積む
+    stack: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "functions": {
+                name: {"total_ms": round(total * 1000, 3), "self_ms": round(own * 1000, 3), "calls": int(calls)}
+                for name, (total, own, calls) in self.timings.items()
+            },
+        }
+
+
+class RenderProfiler:
+    """render_* 関数と main の所要時間を再実行ごとに集計し、直近 window 回分を保持する。
+
+    計測中の再実行はスクリプトを実行しているスレッドごとに持つため、複数セッションが同時に描画しても混ざらない。
+    フラグメント単位の再実行は main を通らないため集計しない。
+    """
+
+    def __init__(self, window: int) -> None:
+        self._reruns: Deque[RerunProfile] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def profile_rerun(self, function: Callable[..., T], page_of: Callable[[], str]) -> Callable[..., T]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            rerun = RerunProfile(started_at=time.time())
+            self._local.rerun = rerun
+            started = time.perf_counter()
+            try:
+                return self._call(function.__name__, function, args, kwargs)
+            finally:
+                rerun.total_seconds = time.perf_counter() - started
+                self._local.rerun = None
+                try:
+                    rerun.page = page_of()
+                except Exception:  # ページ名は補足情報なので、取れなくても記録は残す
+                    pass
+                with self._lock:
+                    self._reruns.append(rerun)
+
+        return wrapper
+
+    def timed(self, function: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            return self._call(function.__name__, function, args, kwargs)
+
+        return wrapper
+
+    def _call(self, name: str, function: Callable[..., T], args: Any, kwargs: Any) -> T:
+        rerun: Optional[RerunProfile] = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return function(*args, **kwargs)
+        rerun.stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = rerun.stack.pop()
+            if rerun.stack:
+                rerun.stack[-1] += elapsed
+            timing = rerun.timings.setdefault(name, [0.0, 0.0, 0])
+            timing[0] += elapsed
+            timing[1] += elapsed - children
+            timing[2] += 1
+
+    def reruns(self) -> List[RerunProfile]:
+        with self._lock:
+            return list(self._reruns)
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """関数ごとに、呼ばれた再実行での合計時間と自己時間のパーセンタイル（ミリ秒）をまとめる。"""
+        reruns = self.reruns()
+        samples: Dict[str, List[List[float]]] = {}
+        for rerun in reruns:
+            for name, timing in rerun.timings.items():
+                samples.setdefault(name, []).append(timing)
+        rows = []
+        for name, timings in samples.items():
+            values = np.array(timings) * [1000, 1000, 1]
+            p50, p95, p99 = np.percentile(values[:, 0], [50, 95, 99]).tolist()
+            rows.append(
+                {
+                    "関数": name,
+                    "再実行数": len(timings),
+                    "呼び出し/回": float(values[:, 2].mean()),
+                    "p50(ms)": p50,
+                    "p95(ms)": p95,
+                    "p99(ms)": p99,
+                    "自己時間p50(ms)": float(np.percentile(values[:, 1], 50)),
+                }
+            )
+        rows.sort(key=lambda row: row["p95(ms)"], reverse=True)
+        return rows
+
+    def export(self, directory: str) -> Tuple[str, int]:
+        """直近の再実行を1行1回のJSONLに書き出し、(パス, 件数) を返す。"""
+        reruns = self.reruns()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"render_profile_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+        with open(path, "w", encoding="utf-8") as output:
+            for rerun in reruns:
+                output.write(json.dumps(rerun.to_dict(), ensure_ascii=False) + "\n")
+        return path, len(reruns)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reruns.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_render_profiler() -> RenderProfiler:
+    return RenderProfiler(RENDER_PROFILE_WINDOW)
+
+
+def instrument_render_functions(namespace: Dict[str, Any]) -> None:
+    """モジュール内の render_* 関数・inject_global_styles・main を計測付きの関数に置き換える。
+
+    呼び出し側はグローバル名で関数を参照しているため、置き換えるだけで内側の呼び出しも計測される。
+    """
+    profiler = get_render_profiler()
+    for name, value in list(namespace.items()):
+        if callable(value) and (name.startswith("render_") or name == "inject_global_styles"):
+            namespace[name] = profiler.timed(value)
+    namespace["main"] = profiler.profile_rerun(
+        namespace["main"], lambda: str(st.session_state.get("current_demo", ""))
+    )
+
+
+def build_score_card_html(label: str, score: int, reason: str) -> str:
+    safe_label = html.escape(label)
+    safe_reason = html.escape(reason)
+    return f"""
 <div style=\"border:1px solid #d6e2ff; border-radius:18px; padding:18px; background:linear-gradient(145deg, #ffffff 0%, #f2f7ff 100%); height:100%; box-shadow:0 12px 22px rgba(15, 23, 42, 0.08);\">
   <div style=\"display:flex; justify-content:space-between; align-items:center;\">
     <div style=\"font-weight:600; font-size:15px; color:#1f2937;\">{safe_label}</div>
@@ -587,10 +3322,33 @@ def render_score_cards(section_title: str, entries: List[Any]) -> None:
 </div>
 """
 
+
+def build_metric_card_html(title: str, value: str, caption: str, accent: str) -> str:
+    safe_title = html.escape(title)
+    safe_value = html.escape(value)
+    safe_caption = html.escape(caption)
+    return f"""
+<div style=\"border-radius:16px; padding:18px 20px; background:{accent}; color:#0f172a; box-shadow:0 8px 18px rgba(15, 23, 42, 0.08);\">
+  <div style=\"font-size:13px; font-weight:600; opacity:0.75;\">{safe_title}</div>
+  <div style=\"font-size:30px; font-weight:700; margin:6px 0 10px;\">{safe_value}</div>
+  <div style=\"font-size:12px; opacity:0.75;\">{safe_caption}</div>
+</div>
+"""
+
+
+def render_score_cards(section_title: str, entries: List[Any]) -> None:
+    if not entries:
+        return
+
+    st.markdown(f"### {section_title}")
+    columns = 2 if len(entries) > 2 else len(entries)
+    cols = st.columns(columns or 1)
+
     for idx, (label, entry) in enumerate(entries):
         column = cols[idx % (columns or 1)]
         with column:
-            st.markdown(score_card_html(label, entry["score"], entry["reason"]), unsafe_allow_html=True)
+            card_html = build_score_card_html(label, entry["score"], entry["reason"])
+            st.markdown(card_html, unsafe_allow_html=True)
 
 
 def render_metric_row(metrics: List[Dict[str, str]]) -> None:
@@ -599,30 +3357,11 @@ def render_metric_row(metrics: List[Dict[str, str]]) -> None:
 
     cols = st.columns(len(metrics))
 
-    def metric_html(title: str, value: str, caption: str, accent: str) -> str:
-        safe_title = html.escape(title)
-        safe_value = html.escape(value)
-        safe_caption = html.escape(caption)
-        return f"""
-<div style=\"border-radius:16px; padding:18px 20px; background:{accent}; color:#0f172a; box-shadow:0 8px 18px rgba(15, 23, 42, 0.08);\">
-  <div style=\"font-size:13px; font-weight:600; opacity:0.75;\">{safe_title}</div>
-  <div style=\"font-size:30px; font-weight:700; margin:6px 0 10px;\">{safe_value}</div>
-  <div style=\"font-size:12px; opacity:0.75;\">{safe_caption}</div>
-</div>
-"""
-
-    accents = ["linear-gradient(135deg, #dce9ff 0%, #f1f6ff 100%)", "linear-gradient(135deg, #f7d9ff 0%, #fdefff 100%)", "linear-gradient(135deg, #dff8ff 0%, #f1fcff 100%)", "linear-gradient(135deg, #ffe5d4 0%, #fff3ea 100%)"]
-
     for idx, metric in enumerate(metrics):
-        accent = accents[idx % len(accents)]
+        accent = METRIC_CARD_ACCENTS[idx % len(METRIC_CARD_ACCENTS)]
         with cols[idx]:
             st.markdown(
-                metric_html(
-                    metric["title"],
-                    metric["value"],
-                    metric.get("caption", ""),
-                    accent,
-                ),
+                build_metric_card_html(metric["title"], metric["value"], metric.get("caption", ""), accent),
                 unsafe_allow_html=True,
             )
 
@@ -646,7 +3385,7 @@ def render_evaluation_overview(records: List[StudentRecord]) -> None:
         },
     ]
 
-    stats = compute_cohort_stats(records)
+    stats = compute_cohort_stats(get_participant_store().score_matrix("succession"))
     if stats:
         comp_avg = sum(stats["avg_competency"].values()) / len(COMPETENCY_LABELS)
         readiness_avg = sum(stats["avg_readiness"].values()) / len(READINESS_LABELS)
@@ -662,12 +3401,7 @@ def render_evaluation_overview(records: List[StudentRecord]) -> None:
     render_metric_row(metrics)
 
 
-def render_student_card(
-    record: StudentRecord,
-    show_header: bool = True,
-    *,
-    key_prefix: Optional[str] = None,
-):
+def render_student_card(record: StudentRecord, show_header: bool = True):
     if record.evaluation is None:
         st.warning("まだ評価が実行されていません。")
         return
@@ -675,43 +3409,28 @@ def render_student_card(
     if show_header:
         st.subheader(f"{record.name} の評価")
 
-    competency_scores = []
-    readiness_scores = []
-    competency_entries = []
-    readiness_entries = []
-
-    for label, _ in COMPETENCY_LABELS:
-        entry = record.evaluation["competency"][label]
-        competency_scores.append(entry["score"])
-        competency_entries.append((label, entry))
-
-    for label, _ in READINESS_LABELS:
-        entry = record.evaluation["readiness"][label]
-        readiness_scores.append(entry["score"])
-        readiness_entries.append((label, entry))
-
-    comp_avg = sum(competency_scores) / len(COMPETENCY_LABELS)
-    readiness_avg = sum(readiness_scores) / len(READINESS_LABELS)
-    all_entries = competency_entries + readiness_entries
-    top_area, top_entry = max(all_entries, key=lambda item: item[1]["score"])
-    growth_area, growth_entry = min(all_entries, key=lambda item: item[1]["score"])
+    summary = record.summary
+    competency_entries = [(label, record.evaluation["competency"][label]) for label, _ in COMPETENCY_LABELS]
+    readiness_entries = [(label, record.evaluation["readiness"][label]) for label, _ in READINESS_LABELS]
+    top_area, top_score = summary.top
+    growth_area, growth_score = summary.growth
 
     render_metric_row(
         [
             {
                 "title": "平均コンピテンシー",
-                "value": f"{comp_avg:.1f}点",
+                "value": f"{summary.section_averages['competency']:.1f}点",
                 "caption": "全5指標の平均スコア",
             },
             {
                 "title": "平均経営者準備度",
-                "value": f"{readiness_avg:.1f}点",
+                "value": f"{summary.section_averages['readiness']:.1f}点",
                 "caption": "全3指標の平均スコア",
             },
             {
                 "title": "強み/伸びしろ",
-                "value": f"{top_area} {top_entry['score']}点",
-                "caption": f"課題: {growth_area} {growth_entry['score']}点",
+                "value": f"{top_area} {top_score}点",
+                "caption": f"課題: {growth_area} {growth_score}点（総合 {summary.rank}位 / {summary.cohort_size}名）",
             },
         ]
     )
@@ -721,46 +3440,25 @@ def render_student_card(
 
     st.markdown("---")
     st.markdown(f"**受講生の全体まとめ:** {record.evaluation.get('overall_summary', '（未提供）')}")
-
-    # prefix = key_prefix or record.name
-    # normalized_prefix = prefix.replace(" ", "_")
-
-    # render_radar_chart(
-    #     f"{record.name} - コンピテンシー評価",
-    #     [label for label, _ in COMPETENCY_LABELS],
-    #     {record.name: competency_scores},
-    #     chart_key=f"{normalized_prefix}_competency_radar",
-    # )
-    # render_radar_chart(
-    #     f"{record.name} - 経営者準備度",
-    #     [label for label, _ in READINESS_LABELS],
-    #     {record.name: readiness_scores},
-    #     chart_key=f"{normalized_prefix}_readiness_radar",
-    # )
+    routing_text = describe_routing(record.evaluation)
+    if routing_text:
+        st.caption(routing_text)
 
 
-def compute_cohort_stats(records: List[StudentRecord]):
-    evaluated_records = [record for record in records if record.evaluation]
-    if not evaluated_records:
+def compute_cohort_stats(matrix: CohortScoreMatrix):
+    if not matrix.evaluated_count:
         return None
 
-    competency_totals = {label: 0 for label, _ in COMPETENCY_LABELS}
-    readiness_totals = {label: 0 for label, _ in READINESS_LABELS}
-
-    for record in evaluated_records:
-        for label, _ in COMPETENCY_LABELS:
-            competency_totals[label] += record.evaluation["competency"][label]["score"]
-        for label, _ in READINESS_LABELS:
-            readiness_totals[label] += record.evaluation["readiness"][label]["score"]
-
-    student_count = len(evaluated_records)
-    competency_avg = {label: round(total / student_count, 2) for label, total in competency_totals.items()}
-    readiness_avg = {label: round(total / student_count, 2) for label, total in readiness_totals.items()}
+    competency_avg = matrix.criterion_means("competency").round(2)
+    readiness_avg = matrix.criterion_means("readiness").round(2)
+    quartiles = matrix.percentiles([25, 50, 75])
 
     return {
-        "avg_competency": competency_avg,
-        "avg_readiness": readiness_avg,
-        "student_count": student_count,
+        "avg_competency": {label: float(score) for (label, _), score in zip(COMPETENCY_LABELS, competency_avg)},
+        "avg_readiness": {label: float(score) for (label, _), score in zip(READINESS_LABELS, readiness_avg)},
+        "student_count": matrix.evaluated_count,
+        "overall_std": float(matrix.participant_means().std()),
+        "overall_quartiles": [float(value) for value in quartiles],
     }
 
 
@@ -784,8 +3482,7 @@ def build_cohort_summary(stats: Dict[str, Dict[str, float]]) -> str:
 
 def render_cohort_section(records: List[StudentRecord]):
     st.header("受講生全体の可視化")
-    evaluated_records = [record for record in records if record.evaluation]
-    stats = compute_cohort_stats(records)
+    stats = compute_cohort_stats(get_participant_store().score_matrix("succession"))
     if not stats:
         st.session_state.cohort_summary = None
         st.info("まだ評価済みの受講生はいません。")
@@ -815,6 +3512,11 @@ def render_cohort_section(records: List[StudentRecord]):
             },
         ]
     )
+    lower, median, upper = stats["overall_quartiles"]
+    st.caption(
+        f"受講生ごとの平均スコアの分布: 25%点 {lower:.2f} / 中央値 {median:.2f} / 75%点 {upper:.2f}"
+        f"（標準偏差 {stats['overall_std']:.2f}）"
+    )
 
     # render_radar_chart(
     #     "平均コンピテンシー",
@@ -868,6 +3570,7 @@ def render_cohort_section(records: List[StudentRecord]):
     st.markdown(f"**受講生全体まとめ:** {st.session_state.cohort_summary}")
 
 
+@st.fragment
 def render_individual_results(records: List[StudentRecord]):
     st.subheader("受講生個別結果")
     evaluated_records = [record for record in records if record.evaluation]
@@ -878,7 +3581,7 @@ def render_individual_results(records: List[StudentRecord]):
     if len(evaluated_records) == 1:
         record = evaluated_records[0]
         st.markdown(f"### {record.name} の評価詳細")
-        render_student_card(record, show_header=False, key_prefix=f"individual_single_{record.name}")
+        render_student_card(record, show_header=False)
         return
 
     options = {record.name: record for record in evaluated_records}
@@ -890,11 +3593,7 @@ def render_individual_results(records: List[StudentRecord]):
     )
     selected_record = options[selected_name]
     st.markdown(f"### {selected_record.name} の評価詳細")
-    render_student_card(
-        selected_record,
-        show_header=False,
-        key_prefix=f"individual_select_{selected_name}",
-    )
+    render_student_card(selected_record, show_header=False)
 
 
 REGISTRATION_FIELD_KEYS = {
@@ -914,6 +3613,189 @@ REGISTRATION_FIELD_KEYS = {
 }
 
 
+# 受講生の入力項目（REGISTRATION_FIELD_KEYS のキー）と、評価に渡す入力ラベルの対応（並び順も評価入力の順）
+SUCCESSION_INPUT_LABELS = {
+    "name": "受講生名",
+    "mgmt_action_1": "管理課題 ①具体的な取り組み",
+    "mgmt_result_1": "管理課題 ①プロセス・結果",
+    "mgmt_action_2": "管理課題 ②具体的な取り組み",
+    "mgmt_result_2": "管理課題 ②プロセス・結果",
+    "mgmt_learnings": "管理課題 気づき",
+    "manage_awareness_1": "経営課題 ①危機感・機会感",
+    "manage_awareness_2": "経営課題 ②危機感・機会感",
+    "manage_awareness_3": "経営課題 ③危機感・機会感",
+    "manage_ten_year": "経営課題 10年先の全社課題",
+    "vision": "経営宣言 夢・ビジョン",
+    "action_plan": "経営宣言 行動と変化",
+    "values": "経営宣言 価値観・信念",
+}
+
+GROUP_TRAINING_NAME_LABEL = "受講者名"
+
+# 一括登録で1セルに受け付ける最大文字数
+PARTICIPANT_IMPORT_MAX_CELL_CHARS = 20000
+
+
+@dataclass
+class ParticipantImportReport:
+    imported_indices: List[int] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    ignored_columns: List[str] = field(default_factory=list)
+
+
+def participant_import_columns(kind: str) -> Dict[str, str]:
+    """一括登録ファイルの列名 → 入力ラベルの対応。項目キー・入力ラベル・フォームの見出しを受け付ける。"""
+    if kind == "succession":
+        columns = {"氏名": SUCCESSION_INPUT_LABELS["name"]}
+        for field_key, label in SUCCESSION_INPUT_LABELS.items():
+            columns[field_key] = label
+            columns[label] = label
+        return columns
+
+    columns = {"name": GROUP_TRAINING_NAME_LABEL, "氏名": GROUP_TRAINING_NAME_LABEL}
+    columns[GROUP_TRAINING_NAME_LABEL] = GROUP_TRAINING_NAME_LABEL
+    for _, field_defs in GROUP_TRAINING_SECTIONS:
+        for field_key, label, _ in field_defs:
+            columns[field_key] = label
+            columns[label] = label
+    return columns
+
+
+def participant_input_labels(kind: str) -> List[str]:
+    if kind == "succession":
+        return list(SUCCESSION_INPUT_LABELS.values())
+    labels = [GROUP_TRAINING_NAME_LABEL]
+    for _, field_defs in GROUP_TRAINING_SECTIONS:
+        labels.extend(label for _, label, _ in field_defs)
+    return labels
+
+
+def iter_csv_rows(binary_file: Any) -> Iterator[List[str]]:
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(text_file)
+    finally:
+        # アップロードされたファイルを閉じずに手放す
+        text_file.detach()
+
+
+def iter_excel_rows(binary_file: Any) -> Iterator[List[str]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportError("Excelファイルの読み込みには openpyxl をインストールしてください。") from exc
+
+    # read_only モードはシートを行単位で読み進めるため、行数によらずメモリ使用量が一定になる
+    workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_participant_rows(
+    kind: str,
+    rows: Iterator[List[str]],
+    report: ParticipantImportReport,
+) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """先頭行を見出しとして列を入力ラベルに対応づけ、(行番号, 入力内容) を1行ずつ返す。"""
+    columns = participant_import_columns(kind)
+    header = next(rows, None)
+    if header is None:
+        report.errors.append((1, "見出し行がありません。"))
+        return
+
+    mapping: List[Optional[str]] = []
+    for column in header:
+        label = columns.get(column.strip())
+        mapping.append(label)
+        if label is None and column.strip():
+            report.ignored_columns.append(column.strip())
+    name_label = participant_input_labels(kind)[0]
+    if name_label not in mapping:
+        report.errors.append((1, f"氏名の列（「{name_label}」または「name」）がありません。"))
+        return
+
+    for row_number, row in enumerate(rows, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(row) > len(mapping):
+            report.errors.append((row_number, f"見出しより列が多い行です（{len(row)}列）。"))
+            continue
+        values: Dict[str, str] = {}
+        for label, cell in zip(mapping, row):
+            if label is not None:
+                values[label] = cell.strip()
+        if not values.get(name_label):
+            report.errors.append((row_number, "氏名が空欄です。"))
+            continue
+        too_long = [label for label, value in values.items() if len(value) > PARTICIPANT_IMPORT_MAX_CELL_CHARS]
+        if too_long:
+            report.errors.append(
+                (row_number, f"{PARTICIPANT_IMPORT_MAX_CELL_CHARS}文字を超える項目があります: {', '.join(too_long)}")
+            )
+            continue
+        yield row_number, values
+
+
+def import_participants(kind: str, file_name: str, binary_file: Any) -> ParticipantImportReport:
+    """CSV/Excelを1行ずつ読み、検証に通った行から順に受講者として登録する。"""
+    report = ParticipantImportReport()
+    if file_name.lower().endswith((".xlsx", ".xlsm")):
+        rows = iter_excel_rows(binary_file)
+    else:
+        rows = iter_csv_rows(binary_file)
+
+    store = get_participant_store()
+    labels = participant_input_labels(kind)
+    try:
+        for _, values in iter_participant_rows(kind, rows, report):
+            inputs = {label: values.get(label, "") for label in labels}
+            report.imported_indices.append(store.add(kind, inputs[labels[0]], inputs))
+    except (csv.Error, UnicodeDecodeError) as exc:
+        report.errors.append((0, f"ファイルを読み込めませんでした: {exc}"))
+    if kind == "succession" and report.imported_indices:
+        st.session_state.cohort_summary = None
+    return report
+
+
+def render_participant_import(kind: str) -> None:
+    noun = "受講生" if kind == "succession" else "受講者"
+    with st.expander(f"{noun}の一括登録（CSV / Excel）"):
+        st.caption(
+            "1行目を見出しとし、1行に1名分を記入してください。見出しには入力項目名（例: "
+            f"「{participant_input_labels(kind)[1]}」）または項目キーを使えます。"
+        )
+        uploaded = st.file_uploader(
+            "ファイルを選択", type=["csv", "xlsx", "xlsm"], key=f"{kind}_import_file"
+        )
+        queue_evaluation = st.checkbox(
+            "登録した全員の評価をバックグラウンドで開始する", key=f"{kind}_import_queue"
+        )
+        if uploaded is None or not st.button("一括登録する", key=f"{kind}_import_submit"):
+            return
+
+        try:
+            report = import_participants(kind, uploaded.name, uploaded)
+        except ImportError as exc:
+            st.error(str(exc))
+            return
+
+        if report.imported_indices:
+            st.success(f"{len(report.imported_indices)}名を登録しました。")
+        if report.ignored_columns:
+            st.warning(f"対応する入力項目がないため無視した列: {', '.join(report.ignored_columns)}")
+        if report.errors:
+            st.error(f"{len(report.errors)}行を登録できませんでした。")
+            for row_number, message in report.errors:
+                st.markdown(f"- {row_number}行目: {message}" if row_number else f"- {message}")
+        if queue_evaluation and report.imported_indices:
+            records = get_participant_store().records(kind)
+            submit_evaluation_job(kind, records, report.imported_indices, EVALUATION_JOB_CALLERS[kind])
+            st.toast(f"{len(report.imported_indices)}名の評価をバックグラウンドで開始しました。")
+
+
 def reset_registration_form() -> None:
     st.session_state.registration_form_version += 1
 
@@ -1016,25 +3898,30 @@ def render_succession_registration_page() -> None:
             if not name.strip():
                 st.error("受講生名を入力してください。")
             else:
+                form_values = {
+                    "name": name.strip(),
+                    "mgmt_action_1": mgmt_action_1,
+                    "mgmt_result_1": mgmt_result_1,
+                    "mgmt_action_2": mgmt_action_2,
+                    "mgmt_result_2": mgmt_result_2,
+                    "mgmt_learnings": mgmt_learnings,
+                    "manage_awareness_1": manage_awareness_1,
+                    "manage_awareness_2": manage_awareness_2,
+                    "manage_awareness_3": manage_awareness_3,
+                    "manage_ten_year": manage_ten_year,
+                    "vision": vision,
+                    "action_plan": action_plan,
+                    "values": values,
+                }
                 student_inputs = {
-                    "受講生名": name.strip(),
-                    "管理課題 ①具体的な取り組み": mgmt_action_1,
-                    "管理課題 ①プロセス・結果": mgmt_result_1,
-                    "管理課題 ②具体的な取り組み": mgmt_action_2,
-                    "管理課題 ②プロセス・結果": mgmt_result_2,
-                    "管理課題 気づき": mgmt_learnings,
-                    "経営課題 ①危機感・機会感": manage_awareness_1,
-                    "経営課題 ②危機感・機会感": manage_awareness_2,
-                    "経営課題 ③危機感・機会感": manage_awareness_3,
-                    "経営課題 10年先の全社課題": manage_ten_year,
-                    "経営宣言 夢・ビジョン": vision,
-                    "経営宣言 行動と変化": action_plan,
-                    "経営宣言 価値観・信念": values,
+                    label: form_values[field_key] for field_key, label in SUCCESSION_INPUT_LABELS.items()
                 }
                 add_student_record(name.strip(), student_inputs)
                 st.success(f"{name.strip()} を登録しました。評価は『評価デモ』ページで実行できます。")
                 reset_registration_form()
 
+    render_participant_import("succession")
+
     render_divider()
 
     st.subheader("登録済み受講生")
@@ -1048,8 +3935,12 @@ def render_succession_registration_page() -> None:
 
 def run_student_evaluation(index: int) -> bool:
     try:
-        evaluation = call_claude(st.session_state.students[index].inputs)
-    except (ValueError, ImportError, APIError) as exc:
+        evaluation = evaluate_with_live_score_cards(
+            SUCCESSION_EVALUATOR.sections,
+            st.session_state.students[index].inputs,
+            call_claude,
+        )
+    except (ValueError, ImportError, api_error_type()) as exc:
         st.error(f"評価の呼び出し中にエラーが発生しました: {exc}")
         return False
     set_student_evaluation(index, evaluation)
@@ -1065,19 +3956,21 @@ def render_succession_evaluation_page() -> None:
         return
 
     students = st.session_state.students
-    pending_indices = [idx for idx, record in enumerate(students) if record.evaluation is None]
+    queued_indices = active_job_indices("succession") | active_batch_indices("succession")
+    pending_indices = [
+        idx
+        for idx, record in enumerate(students)
+        if record.evaluation is None and idx not in queued_indices
+    ]
 
     if pending_indices:
         if st.button("未評価の受講生を一括評価", type="primary"):
-            completed_names = []
-            with st.spinner("未評価の受講生を順番に評価しています..."):
-                for idx in pending_indices:
-                    if run_student_evaluation(idx):
-                        completed_names.append(students[idx].name)
-                    else:
-                        break
-            if completed_names:
-                st.success("、".join(completed_names) + " の評価が完了しました。")
+            submit_evaluation_job("succession", students, pending_indices, call_claude)
+            st.toast(f"{len(pending_indices)}名の評価をバックグラウンドで開始しました。")
+
+    render_evaluation_jobs_panel("succession")
+    render_evaluation_batch_panel("succession", students, pending_indices)
+    render_evaluation_export("succession")
 
     render_evaluation_overview(students)
     render_divider()
@@ -1088,11 +3981,7 @@ def render_succession_evaluation_page() -> None:
         record = students[0]
         st.subheader(f"{record.name} の評価")
         if record.evaluation:
-            render_student_card(
-                record,
-                show_header=False,
-                key_prefix=f"single_mode_{record.name}",
-            )
+            render_student_card(record, show_header=False)
         else:
             st.info("まだ評価が実行されていません。下記の内容を確認し、評価を実行してください。")
             st.markdown("**登録内容プレビュー**")
@@ -1108,25 +3997,7 @@ def render_succession_evaluation_page() -> None:
 
     render_divider()
 
-    for idx, record in enumerate(students):
-        expanded = record.evaluation is None
-        with st.expander(record.name, expanded=expanded):
-            status = "評価済み" if record.evaluation else "未評価"
-            st.markdown(f"**評価ステータス**: {status}")
-            if record.evaluation:
-                render_student_card(
-                    record,
-                    show_header=False,
-                    key_prefix=f"expander_{idx}_{record.name}",
-                )
-            else:
-                st.markdown("**登録内容プレビュー**")
-                for section, value in record.inputs.items():
-                    st.markdown(f"- {section}: {value.strip() or '未記入'}")
-                if st.button("Claudeで評価する", key=f"evaluate_{idx}"):
-                    with st.spinner(f"{record.name} を評価しています..."):
-                        if run_student_evaluation(idx):
-                            st.success(f"{record.name} の評価が完了しました。")
+    render_participant_list("succession", students, queued_indices, render_student_panel)
 
     evaluated_records = [record for record in students if record.evaluation]
     if evaluated_records:
@@ -1136,6 +4007,26 @@ def render_succession_evaluation_page() -> None:
         st.info("まだ評価済みの受講生がありません。未評価の受講生を評価してください。")
 
 
+@st.fragment
+def render_student_panel(idx: int, record: StudentRecord) -> None:
+    status = "評価済み" if record.evaluation else "未評価"
+    label = f"{record.name}（{record.summary.overall_score:.1f}点）" if record.summary else record.name
+    with st.expander(label, expanded=record.evaluation is None):
+        st.markdown(f"**評価ステータス**: {status}")
+        if record.evaluation:
+            # スコアカードは開いたときだけ描画する
+            if st.toggle("評価詳細を表示", key=f"succession_open_{record.record_id}"):
+                render_student_card(record, show_header=False)
+        else:
+            st.markdown("**登録内容プレビュー**")
+            for section, value in record.inputs.items():
+                st.markdown(f"- {section}: {value.strip() or '未記入'}")
+            if st.button("Claudeで評価する", key=f"evaluate_{idx}"):
+                with st.spinner(f"{record.name} を評価しています..."):
+                    if run_student_evaluation(idx):
+                        st.success(f"{record.name} の評価が完了しました。")
+
+
 SUCCESSION_NAV_OPTIONS = ["受講生登録", "評価デモ"]
 
 
@@ -1212,7 +4103,7 @@ def render_group_training_input_page() -> None:
             if not name.strip():
                 st.error("受講者名を入力してください。")
             else:
-                participant_inputs: Dict[str, str] = {"受講者名": name.strip()}
+                participant_inputs: Dict[str, str] = {GROUP_TRAINING_NAME_LABEL: name.strip()}
                 for _, field_defs in GROUP_TRAINING_SECTIONS:
                     for field_key, label, _ in field_defs:
                         participant_inputs[label] = form_values.get(field_key, "")
@@ -1220,6 +4111,8 @@ def render_group_training_input_page() -> None:
                 st.success(f"{name.strip()} を登録しました。AI評価は『AI評価』ページで実行できます。")
                 reset_group_training_form()
 
+    render_participant_import("group_training")
+
     render_divider()
 
     participants = st.session_state.group_training_participants
@@ -1233,7 +4126,7 @@ def render_group_training_input_page() -> None:
 
 
 def render_group_training_evaluation_page() -> None:
-    st.caption("登録済みの入力内容をもとに、Claudeによる目標設定能力評価を実行します。")
+    st.caption("登録済みの入力内容をもとに、Claudeによる管理職能力（設問①〜⑦）の評価を実行します。")
 
     participants = st.session_state.group_training_participants
     if not participants:
@@ -1245,18 +4138,23 @@ def render_group_training_evaluation_page() -> None:
 
     st.subheader("受講者一覧とAI評価")
 
-    pending_indices = [idx for idx, record in enumerate(participants) if record.evaluation is None]
+    queued_indices = active_job_indices("group_training") | active_batch_indices("group_training")
+    # 一部の設問の評価に失敗した受講者も対象にする（評価済みの設問はキャッシュから再利用される）
+    pending_indices = [
+        idx
+        for idx, record in enumerate(participants)
+        if (record.evaluation is None or record.evaluation.get("section_errors")) and idx not in queued_indices
+    ]
     if pending_indices:
         if st.button("未評価の受講者を一括評価", type="primary"):
-            completed_names: List[str] = []
-            with st.spinner("未評価の受講者を順番に評価しています..."):
-                for idx in pending_indices:
-                    if run_goal_setting_evaluation(idx):
-                        completed_names.append(participants[idx].name)
-                    else:
-                        break
-            if completed_names:
-                st.success("、".join(completed_names) + " の評価が完了しました。")
+            submit_evaluation_job(
+                "group_training", participants, pending_indices, call_group_training_evaluation
+            )
+            st.toast(f"{len(pending_indices)}名の評価をバックグラウンドで開始しました。")
+
+    render_evaluation_jobs_panel("group_training")
+    render_evaluation_batch_panel("group_training", participants, pending_indices)
+    render_evaluation_export("group_training")
 
     evaluated = [record for record in participants if record.evaluation]
     metrics = [
@@ -1272,34 +4170,21 @@ def render_group_training_evaluation_page() -> None:
         },
     ]
 
-    criterion_averages: Dict[str, float] = {}
+    score_matrix = get_participant_store().score_matrix("group_training")
     if evaluated:
-        for label in GOAL_SETTING_CRITERIA:
-            scores = [record.evaluation["goal_setting"][label]["score"] for record in evaluated]
-            criterion_averages[label] = mean(scores)
-        overall_avg = sum(criterion_averages.values()) / len(GOAL_SETTING_CRITERIA)
+        overall_avg = float(np.nanmean(score_matrix.criterion_means()))
         metrics.append(
             {
                 "title": "平均スコア",
                 "value": f"{overall_avg:.1f}点",
-                "caption": "目標設定能力8観点の平均",
+                "caption": f"設問①〜⑦の{len(score_matrix.columns)}観点の平均",
             }
         )
 
     render_metric_row(metrics)
 
     if evaluated:
-        score_table: List[Dict[str, Any]] = []
-        reason_table: List[Dict[str, str]] = []
-        for label in GOAL_SETTING_CRITERIA:
-            score_row: Dict[str, Any] = {"観点": label}
-            reason_row: Dict[str, str] = {"観点": label}
-            for record in evaluated:
-                entry = record.evaluation["goal_setting"][label]
-                score_row[record.name] = entry["score"]
-                reason_row[record.name] = entry["reason"]
-            score_table.append(score_row)
-            reason_table.append(reason_row)
+        score_table, reason_table = build_group_training_tables(evaluated, score_matrix)
 
         st.markdown("### スコア比較表")
         st.table(score_table)
@@ -1307,37 +4192,69 @@ def render_group_training_evaluation_page() -> None:
         st.markdown("### 評価根拠表")
         st.dataframe(reason_table, use_container_width=True)
 
-        # render_radar_chart(
-        #     "平均スコアレーダーチャート",
-        #     GOAL_SETTING_CRITERIA,
-        #     {"平均スコア": [criterion_averages[label] for label in GOAL_SETTING_CRITERIA]},
-        #     chart_key="goal_setting_average_radar",
-        # )
-
     render_divider()
 
-    for idx, participant in enumerate(participants):
-        expanded = participant.evaluation is None
-        with st.expander(participant.name, expanded=expanded):
-            status = "評価済み" if participant.evaluation else "未評価"
-            st.markdown(f"**評価ステータス**: {status}")
-            if participant.evaluation:
-                render_goal_setting_result(
-                    participant,
-                    key_prefix=f"group_training_{idx}_{participant.name}",
-                )
-            else:
-                st.markdown("**登録内容プレビュー**")
-                for label, value in participant.inputs.items():
-                    st.markdown(f"- {label}: {value.strip() or '未記入'}")
-                if st.button("Claudeで評価する", key=f"group_training_evaluate_{idx}"):
-                    with st.spinner(f"{participant.name} を評価しています..."):
-                        if run_goal_setting_evaluation(idx):
-                            st.success(f"{participant.name} の評価が完了しました。")
+    render_participant_list(
+        "group_training", participants, queued_indices, render_group_training_participant_panel
+    )
+
+
+def build_group_training_tables(
+    evaluated: List[GroupTrainingParticipant],
+    score_matrix: CohortScoreMatrix,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """設問・観点を行、受講者を列とするスコア比較表と評価根拠表を作る。評価に失敗した設問は「—」・空欄にする。"""
+    evaluated_scores = score_matrix.evaluated_scores()
+    score_table: List[Dict[str, str]] = []
+    reason_table: List[Dict[str, str]] = []
+    for column, (section_key, label) in enumerate(score_matrix.columns):
+        title = GROUP_TRAINING_FIELD_LABELS[section_key]
+        score_row: Dict[str, str] = {"設問": title, "観点": label}
+        reason_row: Dict[str, str] = {"設問": title, "観点": label}
+        for row, record in enumerate(evaluated):
+            score = evaluated_scores[row, column]
+            section = record.evaluation.get(section_key)
+            # 列の型を揃えるため、スコアも文字列で持つ（Arrowへの変換で混在型にならないように）
+            score_row[record.name] = "—" if np.isnan(score) else str(int(score))
+            reason_row[record.name] = section[label]["reason"] if section else ""
+        score_table.append(score_row)
+        reason_table.append(reason_row)
+    return score_table, reason_table
+
+
+@st.fragment
+def render_group_training_participant_panel(idx: int, participant: GroupTrainingParticipant) -> None:
+    status = participant_status(participant, idx, set())
+    label = (
+        f"{participant.name}（{participant.summary.overall_score:.1f}点）"
+        if participant.summary
+        else participant.name
+    )
+    with st.expander(label, expanded=participant.evaluation is None):
+        st.markdown(f"**評価ステータス**: {status}")
+        if participant.evaluation:
+            # スコアカードは開いたときだけ描画する
+            if st.toggle("評価詳細を表示", key=f"group_training_open_{participant.record_id}"):
+                render_group_training_result(participant)
+            if participant.evaluation.get("section_errors") and st.button(
+                "失敗した設問を再評価", key=f"group_training_retry_{idx}"
+            ):
+                # 評価済みの設問は評価キャッシュから返るため、API呼び出しは失敗した設問の分だけになる
+                with st.spinner(f"{participant.name} の失敗した設問を再評価しています..."):
+                    if run_group_training_evaluation(idx):
+                        st.success(f"{participant.name} の再評価が完了しました。")
+        else:
+            st.markdown("**登録内容プレビュー**")
+            for label, value in participant.inputs.items():
+                st.markdown(f"- {label}: {value.strip() or '未記入'}")
+            if st.button("Claudeで評価する", key=f"group_training_evaluate_{idx}"):
+                with st.spinner(f"{participant.name} を評価しています..."):
+                    if run_group_training_evaluation(idx):
+                        st.success(f"{participant.name} の評価が完了しました。")
 
 
 def render_group_training_evaluation_client_page() -> None:
-    st.caption("登録済みの入力内容をもとに、Claudeによる目標設定能力評価を実行します。")
+    st.caption("登録済みの入力内容をもとに、Claudeによる管理職能力（設問①〜⑦）の評価結果をまとめます。")
 
     participants = st.session_state.group_training_participants
     if not participants:
@@ -1350,40 +4267,18 @@ def render_group_training_evaluation_client_page() -> None:
     st.markdown("### 受講者別平均スコア一覧")
     evaluated = [participant for participant in participants if participant.evaluation]
     if evaluated:
-        # 受講者を列、評価項目を行に配置
-        # まず各受講者の目標設定能力の平均点を計算
-        participant_averages: Dict[str, str] = {}
-        for participant in evaluated:
-            scores: List[float] = []
-            goal_scores = participant.evaluation.get("goal_setting", {}) if isinstance(participant.evaluation, dict) else {}
-            for label in GOAL_SETTING_CRITERIA:
-                entry = goal_scores.get(label)
-                if isinstance(entry, dict):
-                    score = entry.get("score")
-                    if isinstance(score, (int, float)):
-                        scores.append(score)
-            average_value = mean(scores) if scores else None
-            participant_averages[participant.name] = f"{average_value:.1f}" if average_value is not None else "―"
-
-        # 評価項目を行として構築
-        evaluation_items = [
-            "①管理者の役割と求められる能力・資質",
-            "②目標設定能力を高めるには",
-            "③計画能力を伸ばすには",
-            "④組織化能力を高めるには",
-            "⑤コミュニケーション能力を高めるには",
-            "⑥動機づけ能力を伸ばすには",
-            "⑦使命としての部下・メンバー育成",
-        ]
+        # 受講者を列、設問を行に配置
+        # 設問ごとの各受講者の平均点はスコア行列から一括で求める（評価に失敗した設問はNaN）
+        score_matrix = get_participant_store().score_matrix("group_training")
+        section_keys = list(GROUP_TRAINING_RUBRICS)
+        section_scores = np.array([score_matrix.participant_means(key) for key in section_keys])
+        evaluation_items = [GROUP_TRAINING_FIELD_LABELS[key] for key in section_keys]
 
         table_data: List[Dict[str, Any]] = []
-        for item in evaluation_items:
+        for item, scores in zip(evaluation_items, section_scores):
             row: Dict[str, Any] = {"評価項目": item}
-            for participant in evaluated:
-                if item == "②目標設定能力を高めるには":
-                    row[participant.name] = participant_averages[participant.name]
-                else:
-                    row[participant.name] = ""
+            for participant, score in zip(evaluated, scores):
+                row[participant.name] = "—" if np.isnan(score) else f"{score:.1f}"
             table_data.append(row)
 
         st.table(table_data)
@@ -1391,37 +4286,16 @@ def render_group_training_evaluation_client_page() -> None:
         # レーダーチャートの表示
         st.markdown("### 受講者別評価レーダーチャート")
 
-        # 各受講者のデータを準備
-        chart_data = {}
-        for participant in evaluated:
-            scores = []
-            # 現在は②目標設定能力のみ点数があるので、それ以外は0点
-            scores.append(0)  # ①管理者の役割と求められる能力・資質
-
-            # ②目標設定能力を高めるには - 実際の平均点
-            goal_scores_list: List[float] = []
-            goal_scores = participant.evaluation.get("goal_setting", {}) if isinstance(participant.evaluation, dict) else {}
-            for label in GOAL_SETTING_CRITERIA:
-                entry = goal_scores.get(label)
-                if isinstance(entry, dict):
-                    score = entry.get("score")
-                    if isinstance(score, (int, float)):
-                        goal_scores_list.append(score)
-            avg_score = mean(goal_scores_list) if goal_scores_list else 0
-            scores.append(avg_score)
-
-            scores.append(0)  # ③計画能力を伸ばすには
-            scores.append(0)  # ④組織化能力を高めるには
-            scores.append(0)  # ⑤コミュニケーション能力を高めるには
-            scores.append(0)  # ⑥動機づけ能力を伸ばすには
-            scores.append(0)  # ⑦使命としての部下・メンバー育成
-
-            chart_data[participant.name] = scores
+        # 評価に失敗した設問は0点として描く
+        chart_data = {
+            participant.name: np.nan_to_num(section_scores[:, column]).tolist()
+            for column, participant in enumerate(evaluated)
+        }
 
         # レーダーチャートを描画
         render_radar_chart(
             "受講者別評価比較",
-            [item.replace("①", "").replace("②", "").replace("③", "").replace("④", "").replace("⑤", "").replace("⑥", "").replace("⑦", "") for item in evaluation_items],
+            [item[1:] for item in evaluation_items],
             chart_data,
             chart_key="group_training_client_radar",
         )
@@ -1430,28 +4304,18 @@ def render_group_training_evaluation_client_page() -> None:
         render_divider()
         st.markdown("### 今回の研修総評")
 
-        # 受講者の平均点を計算
-        all_averages = [float(participant_averages[p.name].replace("―", "0")) for p in evaluated]
-        overall_avg = mean(all_averages) if all_averages else 0
+        # 受講者ごとの総合点（設問平均の平均）と全体の平均点
+        average_scores = nan_mean(section_scores, axis=0)
+        overall_avg = float(np.nanmean(average_scores))
 
         # 最高得点と最低得点の受講者を特定
-        max_participant = max(evaluated, key=lambda p: float(participant_averages[p.name].replace("―", "0")))
-        min_participant = min(evaluated, key=lambda p: float(participant_averages[p.name].replace("―", "0")))
-
-        # 観点別の平均スコアを計算し、最高と最低を特定
-        criterion_scores: Dict[str, List[float]] = {label: [] for label in GOAL_SETTING_CRITERIA}
-        for participant in evaluated:
-            goal_scores = participant.evaluation.get("goal_setting", {}) if isinstance(participant.evaluation, dict) else {}
-            for label in GOAL_SETTING_CRITERIA:
-                entry = goal_scores.get(label)
-                if isinstance(entry, dict):
-                    score = entry.get("score")
-                    if isinstance(score, (int, float)):
-                        criterion_scores[label].append(score)
-
-        criterion_avg_scores = {label: mean(scores) if scores else 0 for label, scores in criterion_scores.items()}
-        top_criterion = max(criterion_avg_scores.items(), key=lambda x: x[1])
-        bottom_criterion = min(criterion_avg_scores.items(), key=lambda x: x[1])
+        max_index = int(np.nanargmax(average_scores))
+        min_index = int(np.nanargmin(average_scores))
+
+        # 設問別の平均スコアを計算し、最高と最低を特定
+        section_means = nan_mean(section_scores, axis=1)
+        top_section = (evaluation_items[int(np.nanargmax(section_means))], float(np.nanmax(section_means)))
+        bottom_section = (evaluation_items[int(np.nanargmin(section_means))], float(np.nanmin(section_means)))
 
         # メトリック表示
         render_metric_row(
@@ -1463,44 +4327,30 @@ def render_group_training_evaluation_client_page() -> None:
                 },
                 {
                     "title": "強み",
-                    "value": f"{top_criterion[0]}",
-                    "caption": f"{top_criterion[1]:.1f}点 - 最も評価が高い観点",
+                    "value": f"{top_section[0]}",
+                    "caption": f"{top_section[1]:.1f}点 - 最も評価が高い設問",
                 },
                 {
                     "title": "伸びしろ",
-                    "value": f"{bottom_criterion[0]}",
-                    "caption": f"{bottom_criterion[1]:.1f}点 - 強化が期待される観点",
+                    "value": f"{bottom_section[0]}",
+                    "caption": f"{bottom_section[1]:.1f}点 - 強化が期待される設問",
                 },
             ]
         )
 
         summary_text = f"""
-今回の研修では、{len(evaluated)}名の受講者が「目標設定能力を高めるには」の評価を受けました。
-全体の平均スコアは{overall_avg:.1f}点で、受講者の皆様は目標設定に関する基本的な理解と実践力を示しています。
-特に{max_participant.name}様は{participant_averages[max_participant.name]}点と高い評価を獲得し、
-目標設定における明確な表現力と重要性の理解が際立っていました。
-一方で、{min_participant.name}様は{participant_averages[min_participant.name]}点と、
+今回の研修では、{len(evaluated)}名の受講者が設問①〜⑦の管理職能力について評価を受けました。
+全体の平均スコアは{overall_avg:.1f}点で、受講者の皆様はマネジメントに関する基本的な理解と実践力を示しています。
+特に{evaluated[max_index].name}様は{average_scores[max_index]:.1f}点と高い評価を獲得し、
+各設問を通じて明確な表現力と実践への意欲が際立っていました。
+一方で、{evaluated[min_index].name}様は{average_scores[min_index]:.1f}点と、
 今後の成長の余地が大きく、継続的な学習と実践を通じてさらなる向上が期待されます。
 
-観点別では、「{top_criterion[0]}」が平均{top_criterion[1]:.1f}点と全体の強みとして浮かび上がりました。
-一方、「{bottom_criterion[0]}」は平均{bottom_criterion[1]:.1f}点であり、今後重点的に強化すべき領域といえます。
-
-今後は、他の管理職能力（計画力、組織化力、コミュニケーション力など）についても評価を進め、
-総合的なマネジメント力の強化を図っていくことが重要です。
+設問別では、「{top_section[0]}」が平均{top_section[1]:.1f}点と全体の強みとして浮かび上がりました。
+一方、「{bottom_section[0]}」は平均{bottom_section[1]:.1f}点であり、今後重点的に強化すべき領域といえます。
         """.strip()
 
         st.markdown(f"**{summary_text}**")
-
-        # # 受講者一覧とAI評価の詳細
-        # render_divider()
-        # st.markdown("### 受講者一覧とAI評価")
-
-        # for idx, participant in enumerate(evaluated):
-        #     with st.expander(f"{participant.name} の評価詳細", expanded=False):
-        #         render_goal_setting_result(
-        #             participant,
-        #             key_prefix=f"group_training_client_{idx}_{participant.name}",
-        #         )
     else:
         st.info("AI評価が完了した受講者のスコアがまだありません。")
 
@@ -1526,31 +4376,132 @@ def render_group_training_demo(sidebar_container) -> None:
         render_group_training_evaluation_client_page()
 
 
+def render_evaluation_cache_status() -> None:
+    cache = get_evaluation_cache()
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups * 100 if lookups else 0.0
+    with st.expander("評価キャッシュ"):
+        st.caption(
+            f"ヒット {stats['hits']}件 / ミス {stats['misses']}件（ヒット率 {hit_rate:.0f}%）"
+        )
+        st.caption(f"保存件数 {stats['entries']}件")
+        if st.button("キャッシュを削除", key="clear_evaluation_cache"):
+            cache.clear()
+            st.rerun()
+
+
+def render_request_governor_status() -> None:
+    governor = get_request_governor()
+    stats = governor.stats
+    with st.expander("API呼び出し状況"):
+        st.caption(
+            f"同時実行上限 {int(governor.concurrency_limit)} / {governor.max_concurrency}"
+            f"（実行中 {governor.in_flight}件）"
+        )
+        st.caption(
+            f"成功 {stats['succeeded']}件 / レート制限 {stats['throttled']}件 / "
+            f"再試行 {stats['retries']}件 / 失敗 {stats['failed']}件"
+        )
+
+
+def render_evaluation_telemetry_panel() -> None:
+    telemetry = get_evaluation_telemetry()
+    with st.expander("API呼び出し統計"):
+        rows = telemetry.summary_rows()
+        if not rows:
+            st.caption("まだ評価のAPI呼び出しはありません。")
+            return
+        st.caption(f"所要時間・初回トークンまでの時間は直近{telemetry.window}件の分布です。")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        routing_rows = telemetry.routing_rows()
+        if routing_rows:
+            st.caption(f"段階的なモデル選択（{EVALUATION_FAST_MODEL} → {EVALUATION_MODEL}）")
+            st.dataframe(routing_rows, hide_index=True, use_container_width=True)
+        st.download_button(
+            "Prometheus形式でダウンロード",
+            telemetry.prometheus_text(),
+            file_name="evaluation_metrics.prom",
+            mime="text/plain",
+            key="download_evaluation_metrics",
+        )
+        if st.button("統計をリセット", key="clear_evaluation_telemetry"):
+            telemetry.clear()
+            st.rerun()
+
+
+def render_profiler_panel() -> None:
+    profiler = get_render_profiler()
+    with st.expander("描画プロファイル"):
+        reruns = profiler.reruns()
+        if not reruns:
+            st.caption("計測済みの再実行はまだありません。")
+            return
+        totals = np.array([rerun.total_seconds for rerun in reruns]) * 1000
+        p50, p95, p99 = np.percentile(totals, [50, 95, 99]).tolist()
+        st.caption(
+            f"直近{len(reruns)}回の再実行: p50 {p50:.0f}ms / p95 {p95:.0f}ms / p99 {p99:.0f}ms"
+            f"（前回 {totals[-1]:.0f}ms）"
+        )
+        st.dataframe(profiler.summary_rows(), hide_index=True, use_container_width=True)
+        if st.button("ファイルに書き出す", key="render_profile_export"):
+            try:
+                st.session_state.render_profile_file = profiler.export(RENDER_PROFILE_DIRECTORY)
+            except OSError as exc:
+                st.error(f"書き出しに失敗しました: {exc}")
+        exported = st.session_state.get("render_profile_file")
+        if exported and os.path.exists(exported[0]):
+            path, count = exported
+            st.caption(f"{count}回分を書き出しました: {path}")
+            with open(path, "rb") as exported_file:
+                st.download_button(
+                    "ダウンロード", exported_file, file_name=os.path.basename(path), key="render_profile_download"
+                )
+        if st.button("計測結果をリセット", key="render_profile_clear"):
+            profiler.clear()
+            st.rerun()
+
+
 def main() -> None:
     st.set_page_config(page_title="日本能率協会様デモ", page_icon="📊", layout="wide")
     ensure_session_state()
+    drain_evaluation_jobs()
     inject_global_styles()
 
     with st.sidebar:
-        # st.title("ナビゲーション")
-        st.divider()
-
-        demo_options = ["サクセッションデモ", "集合研修デモ"]
-        selected_demo = st.radio(
-            "デモを選択してください",
-            demo_options,
-            key="demo_selector",
-            label_visibility="collapsed",
-            format_func=lambda opt: "👥 " + opt if opt == demo_options[0] else "🏫 " + opt,
-        )
-
         st.divider()
         sidebar_section = st.container()
+        st.divider()
+        render_evaluation_cache_status()
+        render_request_governor_status()
+        render_evaluation_telemetry_panel()
+        if RENDER_PROFILING:
+            render_profiler_panel()
+
+    # デモごとに独立したページにし、選択中のデモのコードだけを実行する（URLで直接開くこともできる）
+    page = st.navigation(
+        [
+            st.Page(
+                lambda: render_succession_demo(sidebar_section),
+                title="サクセッションデモ",
+                icon="👥",
+                url_path="succession",
+                default=True,
+            ),
+            st.Page(
+                lambda: render_group_training_demo(sidebar_section),
+                title="集合研修デモ",
+                icon="🏫",
+                url_path="group_training",
+            ),
+        ]
+    )
+    st.session_state.current_demo = page.title
+    page.run()
 
-    if selected_demo == demo_options[0]:
-        render_succession_demo(sidebar_section)
-    else:
-        render_group_training_demo(sidebar_section)
+
+if RENDER_PROFILING:
+    instrument_render_functions(globals())
 
 
 if __name__ == "__main__":
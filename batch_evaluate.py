@@ -0,0 +1,212 @@
+"""受講者ファイルをStreamlitを起動せずに一括評価するコマンドラインツール。
+
+アプリと同じ評価処理（call_claude / call_group_training_evaluation、評価キャッシュ、レート制限の調停）を使い、
+評価が終わった受講者から順に結果をJSONLへ追記する。出力ファイル自体がチェックポイントを兼ねるため、
+中断した実行は同じコマンドを再実行すれば未完了の受講者だけを評価して再開する。
+
+    python batch_evaluate.py succession participants.csv results.jsonl --concurrency 8
+    python batch_evaluate.py group_training participants.jsonl results.jsonl
+
+APIキーは環境変数 ANTHROPIC_API_KEY（または .streamlit/secrets.toml）で指定する。
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import app
+
+# 入力1行分: (行番号, 評価の入力内容, 行を識別するキー)
+ParticipantRow = Tuple[int, Dict[str, str], str]
+
+
+def make_row_key(row_number: int, inputs: Dict[str, str]) -> str:
+    """行番号と入力内容から行のキーを作る。入力が書き換わった行は再開時に評価し直す。"""
+    material = json.dumps([row_number, list(inputs.items())], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:20]
+
+
+def iter_jsonl_rows(path: str) -> Iterator[List[str]]:
+    """JSONLの各行を、全行のキーの和集合（初出順）を見出しとするCSVと同じ形の行に変換する。
+
+    行ごとに項目が異なっても取りこぼさないよう、見出しを作るために一度ファイル全体を読む（保持するのはキーだけ）。
+    """
+    header: Dict[str, None] = {}
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            if line.strip():
+                header.update(dict.fromkeys(json.loads(line)))
+    if not header:
+        return
+    yield list(header)
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield ["" if record.get(column) is None else str(record.get(column)) for column in header]
+
+
+def iter_input_rows(kind: str, path: str, report: app.ParticipantImportReport) -> Iterator[ParticipantRow]:
+    if path.lower().endswith(".jsonl"):
+        rows = iter_jsonl_rows(path)
+        source = None
+    else:
+        source = open(path, "rb")
+        rows = app.iter_csv_rows(source)
+    labels = app.participant_input_labels(kind)
+    participant_rows = app.iter_participant_rows(kind, rows, report)
+    try:
+        for row_number, values in participant_rows:
+            inputs = {label: values.get(label, "") for label in labels}
+            yield row_number, inputs, make_row_key(row_number, inputs)
+    finally:
+        # 途中で打ち切られた場合も、ファイルを閉じる前に読み取り側のジェネレーターを終了させる
+        participant_rows.close()
+        rows.close()
+        if source is not None:
+            source.close()
+
+
+def load_completed_keys(output_path: str) -> Set[str]:
+    """出力済みの行キーを読む。書き込み途中で中断した最終行は無視する。"""
+    completed: Set[str] = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as output:
+        for line in output:
+            try:
+                completed.add(json.loads(line)["row_key"])
+            except (ValueError, KeyError):
+                continue
+    return completed
+
+
+def evaluate_row(kind: str, row: ParticipantRow) -> Dict[str, Any]:
+    row_number, inputs, row_key = row
+    started = time.monotonic()
+    evaluation = app.EVALUATION_JOB_CALLERS[kind](inputs)
+    summary = app.summarize_evaluation(app.SCORE_COLUMNS[kind], evaluation)
+    return {
+        "row_key": row_key,
+        "row": row_number,
+        "name": inputs[app.participant_input_labels(kind)[0]],
+        "inputs": inputs,
+        "evaluation": evaluation,
+        "overall_score": round(summary.overall_score, 2),
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+    }
+
+
+def append_line(output: Any, payload: Dict[str, Any]) -> None:
+    output.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    output.flush()
+    os.fsync(output.fileno())
+
+
+def positive_int(value: str) -> int:
+    """argparse用: 1以上の整数だけを受け付ける。"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.concurrency > app.BULK_EVALUATION_MAX_WORKERS:
+        # API呼び出しはレート制限の調停で BULK_EVALUATION_MAX_WORKERS 件までに抑えられるため、それ以上は待つだけになる
+        print(
+            f"--concurrency {args.concurrency} は上限の {app.BULK_EVALUATION_MAX_WORKERS} に下げます"
+            "（環境変数 BULK_EVALUATION_MAX_WORKERS で変更できます）。",
+            file=sys.stderr,
+        )
+        args.concurrency = app.BULK_EVALUATION_MAX_WORKERS
+    report = app.ParticipantImportReport()
+    completed = load_completed_keys(args.output)
+    rows = (row for row in iter_input_rows(args.kind, args.input, report) if row[2] not in completed)
+    if completed:
+        print(f"{len(completed)}名は評価済みのため省略します。", file=sys.stderr)
+
+    if app.PROMPT_CACHE_WARMUP:
+        try:
+            for spec in app.EVALUATION_JOB_EVALUATORS[args.kind]:
+                app.warm_up_prompt_cache(spec)
+        except Exception as exc:  # ウォームアップの失敗は評価自体には影響しない
+            print(f"プロンプトキャッシュのウォームアップに失敗しました: {exc}", file=sys.stderr)
+
+    errors_path = f"{args.output}.errors.jsonl"
+    succeeded = failed = 0
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="batch-evaluate")
+    in_flight: Dict[Future, ParticipantRow] = {}
+    try:
+        with open(args.output, "a", encoding="utf-8") as output, open(
+            errors_path, "a", encoding="utf-8"
+        ) as errors:
+            while True:
+                # 投入済みの件数を同時実行数の2倍までに抑え、入力ファイル全体を先読みしない
+                while len(in_flight) < args.concurrency * 2:
+                    row = next(rows, None)
+                    if row is None:
+                        break
+                    in_flight[executor.submit(evaluate_row, args.kind, row)] = row
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row_number, inputs, row_key = in_flight.pop(future)
+                    try:
+                        append_line(output, future.result())
+                        succeeded += 1
+                    except Exception as exc:  # 受講者単位の失敗として記録し、再実行時に評価し直す
+                        append_line(errors, {"row_key": row_key, "row": row_number, "error": str(exc)})
+                        failed += 1
+                    if (succeeded + failed) % args.progress_every == 0:
+                        print(f"評価済み {succeeded}名 / 失敗 {failed}名", file=sys.stderr)
+    except KeyboardInterrupt:
+        for future in in_flight:
+            future.cancel()
+        print("中断しました。同じコマンドを再実行すると続きから再開します。", file=sys.stderr)
+        executor.shutdown(wait=False)
+        return 130
+    executor.shutdown()
+
+    # JSONLには見出し行がないため、行番号を1つ詰めて表示する
+    line_offset = 1 if args.input.lower().endswith(".jsonl") else 0
+    for row_number, message in report.errors:
+        print(f"{row_number - line_offset}行目: {message}", file=sys.stderr)
+    print(f"完了: 評価 {succeeded}名 / 失敗 {failed}名 / 入力エラー {len(report.errors)}行", file=sys.stderr)
+    return 1 if failed or report.errors else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=sorted(app.EVALUATION_JOB_CALLERS), help="評価の種類")
+    parser.add_argument("input", help="受講者の入力ファイル（.csv または .jsonl）")
+    parser.add_argument("output", help="評価結果を追記するJSONLファイル（再開用のチェックポイントを兼ねる）")
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=app.BULK_EVALUATION_MAX_WORKERS,
+        help=(
+            f"同時に評価する人数の上限（最大 {app.BULK_EVALUATION_MAX_WORKERS}）。"
+            "API呼び出しの同時数は最大値の半分から始まり、レート制限の応答に応じて最大値まで増減する"
+        ),
+    )
+    parser.add_argument("--progress-every", type=positive_int, default=10, help="進捗を表示する間隔（人数）")
+    args = parser.parse_args()
+    # Streamlitの実行環境外で使うため、キャッシュ機構などの警告を抑える
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""アプリのPython側の主要処理のマイクロベンチマーク。
+
+    python benchmarks/hot_paths_benchmark.py [--sizes 10 100 1000 10000] [--output results.json]
+                                             [--baseline previous.json] [--max-regression 1.5]
+
+日本語の合成コホート（受講者名・入力内容・評価結果）を人数ごとに生成し、次の処理の所要時間を計測する。
+
+- prepare_evaluation_inputs: 受講者全員分の入力の正規化とトークン予算による短縮
+- extract_json_from_text: 受講者全員分の応答テキストからのJSON抽出
+- compute_cohort_stats: スコア行列からの全体集計
+- build_cohort_summary: 集計値からのまとめ文の生成（人数によらない一定時間の処理）
+- build_group_training_tables: 集合研修の評価ページのスコア比較表・評価根拠表の構築
+- build_score_card_html / build_metric_card_html: スコアカード・メトリクスカードのHTML生成
+
+人数に比例する処理は受講者1名あたりの時間（µs/名）で、CONSTANT_TIME_BENCHMARKS の処理は1回あたりの時間（µs/回）で判定する。
+一定時間の処理を人数で割ると、大きいコホートほど上限が実質的に緩くなり退行を検出できないため。
+結果はJSONで保存し、所要時間が hot_paths_thresholds.json の上限（per_participant_us は処理・人数ごと、
+per_call_us は処理ごと）を超えた場合、または --baseline の結果に対して --max-regression 倍を超えて遅くなった場合は
+終了コード1を返す。
+
+上限は、このスクリプトを3回実行した中央値の2倍を、有効数字2桁に切り上げた値にしている。
+per_call_us は全人数での最大値をもとにする。処理を速くした・遅くしたときは同じ手順で取り直す。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (  # noqa: E402
+    COMPETENCY_LABELS,
+    GROUP_TRAINING_RUBRICS,
+    METRIC_CARD_ACCENTS,
+    READINESS_LABELS,
+    SCORE_COLUMNS,
+    CohortScoreMatrix,
+    GroupTrainingParticipant,
+    StudentRecord,
+    build_cohort_summary,
+    build_group_training_tables,
+    build_metric_card_html,
+    build_score_card_html,
+    compute_cohort_stats,
+    extract_json_from_text,
+    prepare_evaluation_inputs,
+    summarize_evaluation,
+)
+
+# 人数によらず一定時間で終わる処理（1回あたりの時間で判定する）
+CONSTANT_TIME_BENCHMARKS = {"build_cohort_summary"}
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hot_paths_thresholds.json")
+
+FAMILY_NAMES = ["佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤"]
+GIVEN_NAMES = ["太郎", "花子", "健一", "美咲", "大輔", "陽子", "翔太", "由美", "誠", "愛"]
+REASON_PHRASES = [
+    "中長期の事業環境を踏まえた戦略の方向性が具体的に示されている。",
+    "部門横断の連携を自ら働きかけ、成果につなげている。",
+    "目標の達成基準が数値で表現されており、進捗の確認がしやすい。",
+    "メンバーの納得感を高めるための対話の工夫が見られる。",
+    "一方で、リスクへの備えや代替案の検討には改善の余地がある。",
+    "学んだ内容を職場で試し、振り返りから次の行動を導いている。",
+]
+
+
+def synthetic_name(rng: random.Random, index: int) -> str:
+    return f"{rng.choice(FAMILY_NAMES)} {rng.choice(GIVEN_NAMES)}{index}"
+
+
+def synthetic_reason(rng: random.Random) -> str:
+    return "".join(rng.sample(REASON_PHRASES, rng.randint(1, 3)))
+
+
+def synthetic_inputs(rng: random.Random) -> Dict[str, str]:
+    """全角・半角の混じった入力欄。一部の欄は予算を超える長文（資料の貼り付けを想定）にする。"""
+    inputs: Dict[str, str] = {}
+    for field_number in range(8):
+        repeats = rng.choice([1, 3, 10, 60]) if field_number == 0 else rng.randint(1, 10)
+        # 半角カナ・全角英数を含むのは一部の欄だけにする
+        suffix = "ｱｸｼｮﾝﾗｰﾆﾝｸﾞで ＫＰＩ を確認する。" if field_number % 4 == 0 else ""
+        inputs[f"設問{field_number}"] = "　".join(synthetic_reason(rng) + suffix for _ in range(repeats))
+    return inputs
+
+
+def synthetic_succession_evaluation(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "competency": {
+            label: {"score": rng.randint(1, 5), "reason": synthetic_reason(rng)} for label, _ in COMPETENCY_LABELS
+        },
+        "readiness": {
+            label: {"score": rng.randint(1, 5), "reason": synthetic_reason(rng)} for label, _ in READINESS_LABELS
+        },
+        "overall_summary": synthetic_reason(rng),
+    }
+
+
+def synthetic_group_training_evaluation(rng: random.Random) -> Dict[str, Any]:
+    evaluation: Dict[str, Any] = {
+        section_key: {label: {"score": rng.randint(1, 5), "reason": synthetic_reason(rng)} for label in criteria}
+        for section_key, criteria in GROUP_TRAINING_RUBRICS.items()
+    }
+    evaluation["overall_summary"] = synthetic_reason(rng)
+    return evaluation
+
+
+def synthetic_cohort(size: int, seed: int) -> Dict[str, Any]:
+    """受講者 size 名分の合成データ（応答テキスト・評価済みレコード・スコア行列）を作る。"""
+    rng = random.Random(seed)
+    students: List[StudentRecord] = []
+    participants: List[GroupTrainingParticipant] = []
+    responses: List[str] = []
+    inputs: List[Dict[str, str]] = []
+    for index in range(size):
+        evaluation = synthetic_succession_evaluation(rng)
+        students.append(StudentRecord(name=synthetic_name(rng, index), inputs={}, evaluation=evaluation))
+        # 実際の応答と同じく、前置きの文章やコードブロックに包まれたJSONを解析対象にする
+        body = json.dumps(evaluation, ensure_ascii=False, indent=2)
+        responses.append(f"以下が評価結果です。\n```json\n{body}\n```\n")
+        inputs.append(synthetic_inputs(rng))
+
+        group_training = synthetic_group_training_evaluation(rng)
+        participant = GroupTrainingParticipant(name=synthetic_name(rng, index), inputs={}, evaluation=group_training)
+        participant.summary = summarize_evaluation(SCORE_COLUMNS["group_training"], group_training)
+        participants.append(participant)
+    succession_matrix = CohortScoreMatrix.from_records(SCORE_COLUMNS["succession"], students)
+    return {
+        "students": students,
+        "participants": participants,
+        "responses": responses,
+        "inputs": inputs,
+        "succession_matrix": succession_matrix,
+        # アプリと同じく、まとめ文は計算済みの集計値から作る
+        "succession_stats": compute_cohort_stats(succession_matrix),
+        "group_training_matrix": CohortScoreMatrix.from_records(SCORE_COLUMNS["group_training"], participants),
+    }
+
+
+def build_all_score_cards(cohort: Dict[str, Any]) -> None:
+    for record in cohort["participants"]:
+        for section_key in GROUP_TRAINING_RUBRICS:
+            for label, entry in record.evaluation[section_key].items():
+                build_score_card_html(label, entry["score"], entry["reason"])
+
+
+def build_all_metric_cards(cohort: Dict[str, Any]) -> None:
+    for record in cohort["participants"]:
+        summary = record.summary
+        build_metric_card_html("平均スコア", f"{summary.overall_score:.1f}点", "設問平均の平均", METRIC_CARD_ACCENTS[0])
+        build_metric_card_html("強み", f"{summary.top[0]} {summary.top[1]}点", "最もスコアが高い観点", METRIC_CARD_ACCENTS[1])
+        build_metric_card_html(
+            "伸びしろ", f"{summary.growth[0]} {summary.growth[1]}点", "優先的に強化したい観点", METRIC_CARD_ACCENTS[2]
+        )
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "prepare_evaluation_inputs": lambda cohort: [prepare_evaluation_inputs(inputs) for inputs in cohort["inputs"]],
+    "extract_json_from_text": lambda cohort: [extract_json_from_text(text) for text in cohort["responses"]],
+    "compute_cohort_stats": lambda cohort: compute_cohort_stats(cohort["succession_matrix"]),
+    "build_cohort_summary": lambda cohort: build_cohort_summary(cohort["succession_stats"]),
+    "build_group_training_tables": lambda cohort: build_group_training_tables(
+        cohort["participants"], cohort["group_training_matrix"]
+    ),
+    "build_score_card_html": build_all_score_cards,
+    "build_metric_card_html": build_all_metric_cards,
+}
+
+
+def time_benchmark(function: Callable[[Dict[str, Any]], Any], cohort: Dict[str, Any], size: int) -> Dict[str, float]:
+    # 小さいコホートは繰り返し回数を増やし、計測のばらつきを抑える
+    repeats = max(3, min(200, 20_000 // size))
+    function(cohort)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(cohort)
+        samples.append(time.perf_counter() - started)
+    median = statistics.median(samples)
+    return {
+        "repeats": repeats,
+        "median_ms": median * 1000,
+        "min_ms": min(samples) * 1000,
+        "per_call_us": median * 1_000_000,
+        "per_participant_us": median / size * 1_000_000,
+    }
+
+
+def judged_value(name: str, measurement: Dict[str, float]) -> Tuple[float, str]:
+    """判定に使う値と単位。一定時間の処理は1回あたり、それ以外は受講者1名あたり。"""
+    if name in CONSTANT_TIME_BENCHMARKS:
+        return measurement.get("per_call_us", measurement["median_ms"] * 1000), "µs/回"
+    return measurement["per_participant_us"], "µs/名"
+
+
+def check_regressions(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    thresholds: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Any],
+    max_regression: float,
+) -> List[str]:
+    problems: List[str] = []
+    for name, by_size in results.items():
+        for size, measurement in by_size.items():
+            if name in CONSTANT_TIME_BENCHMARKS:
+                limit = thresholds["per_call_us"].get(name)
+            else:
+                limit = thresholds["per_participant_us"].get(name, {}).get(size)
+            value, unit = judged_value(name, measurement)
+            if limit is not None and value > limit:
+                problems.append(f"{name} ({size}名): {value:.1f}{unit} が上限 {limit}{unit} を超えました")
+            previous = baseline.get("results", {}).get(name, {}).get(size)
+            if previous:
+                previous_value, _ = judged_value(name, previous)
+                if value > previous_value * max_regression:
+                    problems.append(
+                        f"{name} ({size}名): {value:.1f}{unit} が基準 "
+                        f"{previous_value:.1f}{unit} の{max_regression}倍を超えました"
+                    )
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="計測する処理を限定する")
+    parser.add_argument("--output", default="hot_paths_benchmark.json", help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較対象とする過去の結果ファイル")
+    parser.add_argument("--max-regression", type=float, default=1.5)
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {name: {} for name in names}
+    for size in args.sizes:
+        cohort = synthetic_cohort(size, args.seed)
+        for name in names:
+            measurement = time_benchmark(BENCHMARKS[name], cohort, size)
+            results[name][str(size)] = measurement
+            value, unit = judged_value(name, measurement)
+            print(f"{name:<28} {size:>6}名  {measurement['median_ms']:>10.3f} ms  ({value:.2f} {unit})")
+
+    with open(THRESHOLDS_PATH, encoding="utf-8") as thresholds_file:
+        thresholds = json.load(thresholds_file)
+    baseline: Dict[str, Any] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    problems = check_regressions(results, thresholds, baseline, args.max_regression)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(
+            {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "results": results,
+                "thresholds": thresholds,
+                "problems": problems,
+            },
+            output,
+            ensure_ascii=False,
+            indent=2,
+        )
+    print(f"結果を {args.output} に保存しました。")
+
+    for problem in problems:
+        print(f"NG: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
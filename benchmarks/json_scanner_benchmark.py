@@ -0,0 +1,151 @@
+"""IncrementalJsonScanner のファズテストと計算量の確認。
+
+    python benchmarks/json_scanner_benchmark.py [--fuzz-cases 2000] [--seed 0]
+
+ファズでは評価根拠に「{」「}」「"」「\\」や改行を含む応答を、前置き・後置きの文章つきで
+ランダムなチャンクに分けて入力し、正しいオブジェクトを取り出せることと、
+途中で切れた・括弧が壊れた応答では JsonExtractionError 以外の例外が出ないことを確認する。
+ベンチマークでは応答サイズを10倍ずつ増やし、1文字あたりの処理時間がほぼ一定（線形時間）であることを確認する。
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (  # noqa: E402
+    COMPETENCY_LABELS,
+    READINESS_LABELS,
+    IncrementalJsonScanner,
+    JsonExtractionError,
+)
+
+REASON_FRAGMENTS = ["戦略の{前提}を整理", "「目標}」を明示", '"引用"あり', "\\", "改行\n", "{", "}", "[", "]", ":", "ｱｸｼｮﾝ", "😀"]
+PROSE_FRAGMENTS = ["以下が評価です。", "```json", "```", "補足: {未使用}", "} 余分な括弧", '"', ""]
+
+# 1文字あたりの処理時間が、最小サイズに対して何倍までなら線形とみなすか
+LINEARITY_TOLERANCE = 3.0
+
+
+def random_reason(rng: random.Random) -> str:
+    return "".join(rng.choice(REASON_FRAGMENTS) for _ in range(rng.randint(0, 12)))
+
+
+def random_payload(rng: random.Random) -> dict:
+    return {
+        "competency": {label: {"score": rng.randint(1, 5), "reason": random_reason(rng)} for label, _ in COMPETENCY_LABELS},
+        "readiness": {label: {"score": rng.randint(1, 5), "reason": random_reason(rng)} for label, _ in READINESS_LABELS},
+        "overall_summary": random_reason(rng),
+    }
+
+
+def feed_in_chunks(rng: random.Random, text: str) -> IncrementalJsonScanner:
+    scanner = IncrementalJsonScanner()
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 40)
+        scanner.feed(text[position : position + size])
+        position += size
+    return scanner
+
+
+def run_fuzz(cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    failures = 0
+    for case in range(cases):
+        body = json.dumps(random_payload(rng), ensure_ascii=False, indent=rng.choice([None, 2]))
+        prefix = "".join(rng.choice(PROSE_FRAGMENTS[:3]) for _ in range(rng.randint(0, 3)))
+        suffix = "".join(rng.choice(PROSE_FRAGMENTS) for _ in range(rng.randint(0, 3)))
+        text = prefix + body + suffix
+
+        scanner = feed_in_chunks(rng, text)
+        if scanner.result() != body:
+            failures += 1
+            print(f"[fuzz {case}] 取り出したオブジェクトが一致しません")
+            continue
+        labels = [path for path, _ in scanner.pop_completed_objects() if len(path) == 2]
+        if len(labels) != len(COMPETENCY_LABELS) + len(READINESS_LABELS):
+            failures += 1
+            print(f"[fuzz {case}] 観点の完了通知が不足しています: {labels}")
+
+        broken = prefix + body[: rng.randint(0, len(body) - 1)]
+        if rng.random() < 0.5:
+            cut = rng.randint(len(prefix), len(broken))
+            broken = broken[:cut] + rng.choice(["]", "}", "[", '"', "\\"]) + broken[cut:]
+        try:
+            extracted = feed_in_chunks(rng, broken).result()
+        except JsonExtractionError as exc:
+            if not 0 <= exc.offset <= len(broken):
+                failures += 1
+                print(f"[fuzz {case}] 失敗位置が範囲外です: {exc.offset}")
+        except Exception as exc:  # noqa: BLE001 - 想定外の例外はすべて失敗として数える
+            failures += 1
+            print(f"[fuzz {case}] 想定外の例外: {exc!r}")
+        else:
+            if extracted == body:
+                failures += 1
+                print(f"[fuzz {case}] 壊れた応答から完全なオブジェクトが取り出されました")
+    return failures
+
+
+def make_large_response(target_chars: int) -> str:
+    entry = {"score": 3, "reason": "根拠{の}説明\"引用\"" * 8}
+    entries_needed = max(1, target_chars // len(json.dumps(entry, ensure_ascii=False)))
+    payload = {"entries": {f"観点{idx}": entry for idx in range(entries_needed)}}
+    return "前置きの文章です。\n" + json.dumps(payload, ensure_ascii=False)
+
+
+def time_scan(text: str, chunk_size: int = 64) -> float:
+    scanner = IncrementalJsonScanner()
+    started = time.perf_counter()
+    for position in range(0, len(text), chunk_size):
+        scanner.feed(text[position : position + chunk_size])
+        scanner.pop_completed_objects()
+    try:
+        scanner.result()
+    except JsonExtractionError:
+        pass
+    return time.perf_counter() - started
+
+
+def run_benchmark(sizes) -> int:
+    shapes = {
+        "valid": make_large_response,
+        "unterminated": lambda size: make_large_response(size)[:-1],
+        "unclosed_string": lambda size: '{"reason": "' + "{" * size,
+    }
+    failures = 0
+    print(f"{'shape':<16}{'chars':>12}{'seconds':>12}{'ns/char':>12}")
+    for shape, factory in shapes.items():
+        per_char = []
+        for size in sizes:
+            text = factory(size)
+            elapsed = time_scan(text)
+            per_char.append(elapsed / len(text))
+            print(f"{shape:<16}{len(text):>12}{elapsed:>12.4f}{per_char[-1] * 1e9:>12.1f}")
+        ratio = per_char[-1] / per_char[0]
+        if ratio > LINEARITY_TOLERANCE:
+            failures += 1
+            print(f"  -> {shape}: 1文字あたりの時間が {ratio:.1f} 倍に増えています（線形ではありません）")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fuzz-cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    failures = run_fuzz(args.fuzz_cases, args.seed)
+    print(f"fuzz: {args.fuzz_cases}件中 失敗 {failures}件")
+    failures += run_benchmark(args.sizes)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""アプリの起動時間・再実行時間の計測と予算チェック。
+
+    python benchmarks/startup_benchmark.py [--repeats 3] [--reruns 10] [--output startup_benchmark.json]
+
+新しいPythonプロセスで毎回計測するため、サーバー起動直後の新規セッションと同じ条件になる。
+
+- import_ms: app モジュールの読み込み（Streamlit本体を含む）
+- first_run_ms: 各デモページのセッション開始時の初回実行
+- rerun_ms: 同じページの再実行（中央値）
+- lazy_modules: 各ページを表示しただけで読み込まれてはいけないモジュール（評価を実行するまで不要な anthropic など）
+
+いずれかの値が startup_budget.json の予算を超えた場合は終了コード1を返す。
+受講者データと評価キャッシュは一時ディレクトリに作るため、既存のデータには触れない。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# ページ単体の計測に使うスクリプト（サイドバーの状況表示などを除いた、デモ本体の描画だけを実行する）
+PAGE_SCRIPTS = {
+    "succession": "import streamlit as st\nimport app\napp.ensure_session_state()\n"
+    "app.render_succession_demo(st.sidebar.container())\n",
+    "group_training": "import streamlit as st\nimport app\napp.ensure_session_state()\n"
+    "app.render_group_training_demo(st.sidebar.container())\n",
+}
+
+
+def measure_in_process(reruns: int) -> Dict[str, Any]:
+    """新しいプロセスの中で1回分を計測する（--worker から呼ばれる）。"""
+    import logging
+
+    sys.path.insert(0, ROOT)
+    started = time.perf_counter()
+    import app  # noqa: F401
+
+    import_ms = (time.perf_counter() - started) * 1000
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from streamlit.testing.v1 import AppTest
+
+    first_run_ms: Dict[str, float] = {}
+    rerun_ms: Dict[str, float] = {}
+    tests = {"app": AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)}
+    tests.update({page: AppTest.from_string(script, default_timeout=60) for page, script in PAGE_SCRIPTS.items()})
+    for name, test in tests.items():
+        started = time.perf_counter()
+        test.run()
+        first_run_ms[name] = (time.perf_counter() - started) * 1000
+        if test.exception:
+            raise RuntimeError(f"{name} の実行に失敗しました: {test.exception}")
+        samples = []
+        for _ in range(reruns):
+            started = time.perf_counter()
+            test.run()
+            samples.append((time.perf_counter() - started) * 1000)
+        rerun_ms[name] = statistics.median(samples)
+    return {
+        "import_ms": import_ms,
+        "first_run_ms": first_run_ms,
+        "rerun_ms": rerun_ms,
+        "loaded_modules": sorted(name for name in load_budget()["lazy_modules"] if name in sys.modules),
+    }
+
+
+def load_budget() -> Dict[str, Any]:
+    with open(BUDGET_PATH, encoding="utf-8") as budget_file:
+        return json.load(budget_file)
+
+
+def run_worker(reruns: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            PARTICIPANT_STORE_PATH=os.path.join(directory, "participants.sqlite3"),
+            EVALUATION_CACHE_PATH=os.path.join(directory, "evaluation_cache.sqlite3"),
+        )
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--reruns", str(reruns)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def check_budget(result: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    problems: List[str] = []
+    if result["import_ms"] > budget["import_ms"]:
+        problems.append(f"モジュールの読み込み {result['import_ms']:.0f}ms が予算 {budget['import_ms']}ms を超えました")
+    for metric, label in (("first_run_ms", "初回実行"), ("rerun_ms", "再実行")):
+        for page, value in result[metric].items():
+            limit = budget[metric].get(page)
+            if limit is not None and value > limit:
+                problems.append(f"{page} の{label} {value:.0f}ms が予算 {limit}ms を超えました")
+    for module in result["loaded_modules"]:
+        if module in budget["lazy_modules"]:
+            problems.append(f"{module} がページの表示だけで読み込まれました")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3, help="新しいプロセスで計測する回数（中央値を使う）")
+    parser.add_argument("--reruns", type=int, default=10, help="1プロセスあたりの再実行の回数")
+    parser.add_argument("--output", default="startup_benchmark.json", help="結果を保存するJSONファイル")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_in_process(args.reruns)))
+        return 0
+
+    runs = [run_worker(args.reruns) for _ in range(args.repeats)]
+    result = {
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "first_run_ms": {
+            name: statistics.median(run["first_run_ms"][name] for run in runs) for name in runs[0]["first_run_ms"]
+        },
+        "rerun_ms": {name: statistics.median(run["rerun_ms"][name] for run in runs) for name in runs[0]["rerun_ms"]},
+        "loaded_modules": sorted({name for run in runs for name in run["loaded_modules"]}),
+    }
+    print(f"{'モジュールの読み込み':<24} {result['import_ms']:>8.0f} ms")
+    for name in result["first_run_ms"]:
+        print(f"{name:<24} 初回 {result['first_run_ms'][name]:>8.0f} ms / 再実行 {result['rerun_ms'][name]:>8.0f} ms")
+
+    budget = load_budget()
+    problems = check_budget(result, budget)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(
+            {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "result": result,
+                "budget": budget,
+                "problems": problems,
+            },
+            output,
+            ensure_ascii=False,
+            indent=2,
+        )
+    print(f"結果を {args.output} に保存しました。")
+
+    for problem in problems:
+        print(f"NG: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())